@@ -2,10 +2,19 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import hashlib
 import os
 from dotenv import load_dotenv
 from utils.pdf_processor import PDFProcessor
 from utils.gemini_analyzer import GeminiAnalyzer
+from utils.job_catalog import JobCatalog
+from utils.job_queue import JobQueue, WorkerPool, DONE, FAILED
+from utils.metrics import get_store
+from utils.near_duplicates import NearDuplicateIndex
+from utils.result_cache import ResultCache
+from utils.results_store import ResultsStore, SORT_FIELDS
+from utils.resume_index import ResumeIndex, QuerySyntaxError
+from utils.session_store import SessionStore
 
 # Load environment variables
 load_dotenv()
@@ -55,14 +64,62 @@ st.markdown("""
 
 
 
+@st.cache_resource
+def get_result_cache():
+    """Shared on-disk cache of analysis results, reused across reruns and sessions"""
+    return ResultCache()
+
+@st.cache_resource
+def get_near_duplicate_index():
+    """Shared MinHash index used to reuse analyses of near-identical resumes"""
+    return NearDuplicateIndex()
+
+@st.cache_resource
+def get_results_store():
+    """Every analysis result, persisted for the candidate leaderboard"""
+    return ResultsStore()
+
+@st.cache_resource(max_entries=16)
+def get_analyzer(api_key):
+    """Analyzer shared by every session and rerun using this API key"""
+    return GeminiAnalyzer(api_key, cache=get_result_cache(), near_duplicates=get_near_duplicate_index(),
+                          results_store=get_results_store(), resume_index=get_resume_index())
+
+@st.cache_resource
+def get_session_store():
+    """Bounded store holding every session's resume text, job description and results"""
+    return SessionStore()
+
+def save_artifact(name, value):
+    """Keep value in the shared session store; the session itself only holds its key"""
+    st.session_state.artifacts[name] = None if value is None else get_session_store().put(value)
+
+def load_artifact(name):
+    """The session's value for name, or None if it was never set or has been evicted"""
+    return get_session_store().get(st.session_state.artifacts.get(name))
+
+@st.cache_resource
+def get_resume_index():
+    """Shared inverted index of every resume processed by the app"""
+    return ResumeIndex()
+
+@st.cache_resource
+def get_job_queue():
+    """Durable queue that hands analysis requests to background workers"""
+    return JobQueue()
+
+@st.cache_resource(max_entries=16, on_release=WorkerPool.stop_in_background)
+def get_worker_pool(api_key):
+    """Worker processes draining the job queue for this API key; evicted pools are stopped"""
+    return WorkerPool(api_key)
+
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'analysis_results' not in st.session_state:
-        st.session_state.analysis_results = None
-    if 'resume_text' not in st.session_state:
-        st.session_state.resume_text = None
-    if 'job_description' not in st.session_state:
-        st.session_state.job_description = None
+    if 'artifacts' not in st.session_state:
+        # analysis_results, resume_text, job_description and job_matches, as session store keys
+        st.session_state.artifacts = {}
+    if 'pending_job' not in st.session_state:
+        st.session_state.pending_job = None
 
 def display_score_gauge(score, title):
     """Display a gauge chart for scores"""
@@ -106,6 +163,638 @@ def display_section_scores(section_scores):
     fig.update_layout(height=400)
     return fig
 
+def display_partial_analysis(results):
+    """Display the fields of a streaming analysis received so far"""
+    if 'overall_match_score' in results:
+        st.metric("📈 Match Score", f"{results['overall_match_score']}%")
+    if 'summary' in results:
+        st.info(results['summary'])
+    if 'section_scores' in results:
+        st.caption(" · ".join(f"{section.title()}: {score}" for section, score in results['section_scores'].items()))
+    st.caption("Receiving detailed analysis...")
+
+def finish_analysis(results):
+    """Keep a finished analysis for the other tabs, or report why it failed instead of showing a 0% match"""
+    failed = bool(results.get('error'))
+    save_artifact('analysis_results', None if failed else results)
+    # Shown by the Input tab after the app reruns
+    st.session_state.notice = results['error'] if failed else 'success'
+
+@st.fragment(run_every=1)
+def display_job_status():
+    """Poll the queued analysis job and load its result when it finishes"""
+    job_id = st.session_state.pending_job
+    if job_id is None:
+        return
+    
+    job = get_job_queue().get(job_id)
+    if job is None or job['status'] == FAILED:
+        st.session_state.pending_job = None
+        st.error(f"❌ Analysis failed: {job['error'] if job else 'job not found'}")
+    elif job['status'] == DONE:
+        st.session_state.pending_job = None
+        finish_analysis(job['result'])
+        # Rerun the whole script so the Analysis and Suggestions tabs pick up the result
+        st.rerun()
+    else:
+        st.info(f"⏳ Analysis {job['status']}... Results will appear in the Analysis tab.")
+
+# Seconds the metrics panel reuses its last read of the metrics store across reruns
+METRICS_PANEL_TTL = 10
+
+@st.cache_data(ttl=METRICS_PANEL_TTL)
+def load_metrics():
+    """Recent traces and the Prometheus text, read from the store at most once per METRICS_PANEL_TTL"""
+    store = get_store()
+    return store.recent(200), store.prometheus_text()
+
+def display_metrics_panel():
+    """Admin view of stage timings, token usage and cache hits across the app and workers"""
+    if get_store() is None:
+        st.caption("Metrics are disabled (ATS_METRICS=0)")
+        return
+    
+    traces, prometheus_text = load_metrics()
+    if not traces:
+        st.caption("No analyses recorded yet")
+        return
+    
+    stages = pd.DataFrame([trace['stages'] for trace in traces]) * 1000
+    latency = pd.DataFrame({
+        'p50 ms': stages.quantile(0.5),
+        'p95 ms': stages.quantile(0.95),
+        'runs': stages.count()
+    }).round(1)
+    st.caption(f"Stage latency over the last {len(traces)} operations")
+    st.dataframe(latency, use_container_width=True)
+    
+    lookups = [hit for trace in traces for hit in trace['cache'].values()]
+    errors = sum(1 for trace in traces if trace['error'])
+    col1, col2 = st.columns(2)
+    col1.metric("Cache hit rate", f"{sum(lookups) / len(lookups):.0%}" if lookups else "n/a")
+    col2.metric("Errors", errors)
+    col1.metric("Prompt tokens", sum(trace['tokens'].get('prompt', 0) for trace in traces))
+    col2.metric("Response tokens", sum(trace['tokens'].get('response', 0) for trace in traces))
+    
+    st.download_button(
+        "Download Prometheus metrics",
+        data=prometheus_text,
+        file_name="ats_metrics.prom",
+        mime="text/plain"
+    )
+
+@st.cache_data(max_entries=256)
+def score_gauge_figure(score):
+    """Overall score gauge, cached so reruns reuse the figure for the same score"""
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Overall Match Score", 'font': {'size': 20, 'color': '#EEFAFF'}},
+        delta = {'reference': 70, 'increasing': {'color': "#28a745"}, 'decreasing': {'color': "#dc3545"}},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "#EEFAFF"},
+            'bar': {'color': "#262626"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "#230C0F",
+            'steps': [
+                {'range': [0, 30], 'color': "#FF8684"},
+                {'range': [30, 60], 'color': "#FFFF7B"},
+                {'range': [60, 80], 'color': "#96EB96"},
+                {'range': [80, 100], 'color': "#4ECD65"}
+            ],
+            'threshold': {
+                'line': {'color': "#230C0F", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
+            }
+        }
+    ))
+    fig.update_layout(
+        height=300,
+        font={'color': "#EEFAFF", 'family': "Arial"},
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig
+
+@st.cache_data(max_entries=256)
+def section_scores_figure(section_scores):
+    """Section score bar chart for a tuple of (section, score) pairs"""
+    sections = [section for section, _ in section_scores]
+    scores = [score for _, score in section_scores]
+    
+    # Create colorful bar chart
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            x=sections,
+            y=scores,
+            marker_color=colors[:len(sections)],
+            text=scores,
+            textposition='auto',
+            textfont=dict(color='white', size=14, family='Arial Black')
+        )
+    ])
+    
+    fig.update_layout(
+        title={
+            'text': 'Section Performance Analysis',
+            'x': 0.5,
+            'font': {'size': 20, 'color': '#2E86AB'}
+        },
+        xaxis_title="Resume Sections",
+        yaxis_title="Match Score (%)",
+        height=400,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={'color': '#2E86AB'},
+        yaxis=dict(range=[0, 100])
+    )
+    return fig
+
+@st.cache_data(max_entries=256)
+def keywords_table(keywords):
+    """Matched keyword table for a tuple of keywords"""
+    return pd.DataFrame({
+        'Keywords': list(keywords),
+        'Status': ['Matched'] * len(keywords)
+    })
+
+@st.cache_data(max_entries=256)
+def report_csv(results):
+    """Downloadable CSV report, built once per analysis result"""
+    analysis_data = {
+        'Analysis Date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'Overall Score': results['overall_match_score'],
+        'Summary': results['summary'],
+        'Matched Skills': ', '.join(results['matched_skills']),
+        'Missing Skills': ', '.join(results['missing_skills']),
+        'Recommendations': '\n'.join(results['recommendations'])
+    }
+    
+    df_report = pd.DataFrame([analysis_data])
+    csv_data = df_report.to_csv(index=False)
+    return csv_data
+
+@st.fragment
+def display_input_tab(analyzer, api_key, use_queue):
+    """Input tab; its widgets rerun only this tab until an analysis finishes"""
+    st.header("Input Your Data")
+    
+    # Set by the run that finished an analysis, shown after the app reruns
+    notice = st.session_state.pop('notice', None)
+    if notice == 'success':
+        st.success("✅ Analysis completed! Check the Analysis tab for results.")
+        st.balloons()
+    elif notice:
+        st.error(f"❌ {notice}")
+    
+    # Job Description Input
+    st.subheader("Job Description")
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        job_desc_method = st.radio(
+            "How would you like to input the job description?",
+            ["Paste Text", "Upload File"],
+            horizontal=True
+        )
+    
+    if job_desc_method == "Paste Text":
+        job_description = st.text_area(
+            "Paste the job description here:",
+            height=200,
+            placeholder="Paste the complete job description..."
+        )
+    else:
+        uploaded_jd = st.file_uploader(
+            "Upload job description file",
+            type=['txt', 'pdf'],
+            help="Upload a text or PDF file containing the job description"
+        )
+        job_description = ""
+        
+        if uploaded_jd:
+            if uploaded_jd.type == "application/pdf":
+                extraction = PDFProcessor.extract(uploaded_jd)
+                job_description = extraction.text or ""
+                if not extraction.ok:
+                    st.error(f"❌ Failed to extract text from the job description. {extraction.message}")
+                elif extraction.truncated:
+                    st.warning(f"⚠️ {extraction.warning}")
+            else:
+                job_description = str(uploaded_jd.read(), "utf-8")
+    
+    st.markdown("---")
+    
+    # Resume Upload
+    st.subheader("Resume Upload")
+    uploaded_resume = st.file_uploader(
+        "Upload your resume (PDF only)",
+        type=['pdf'],
+        help="Upload your resume in PDF format"
+    )
+    
+    resume_text = ""
+    if uploaded_resume:
+        with st.spinner("Processing resume..."):
+            # Also adds the resume to the search index under the uploaded file name
+            extraction = analyzer.extract_resume(uploaded_resume)
+        resume_text = extraction.text or ""
+        
+        if resume_text:
+            st.success("✅ Resume processed successfully!")
+            if extraction.truncated:
+                st.warning(f"⚠️ {extraction.warning} Scores may be lower than for the whole resume.")
+            with st.expander("Preview extracted text"):
+                st.text_area("Extracted text:", resume_text[:1000] + "..." if len(resume_text) > 1000 else resume_text, height=200)
+        else:
+            st.error(f"❌ Failed to extract text from PDF. {extraction.message} Please try a different file.")
+    
+    # Analysis button
+    st.markdown("---")
+    if st.button("🔍 Analyze Resume", type="primary", use_container_width=True):
+        if not job_description or not resume_text:
+            st.error("Please provide both job description and resume before analyzing.")
+        elif use_queue:
+            get_worker_pool(api_key)
+            st.session_state.pending_job = get_job_queue().submit(
+                "analysis",
+                {"resume_text": resume_text, "job_description": job_description},
+                api_key
+            )
+            save_artifact('analysis_results', None)
+            save_artifact('resume_text', resume_text)
+            save_artifact('job_description', job_description)
+            # Rerun the whole app so the other tabs drop the previous results
+            st.rerun()
+        else:
+            # Show the score and summary as soon as they stream in
+            preview = st.empty()
+            results = None
+            with st.spinner("Analyzing resume match... This may take a few moments."):
+                for results in analyzer.stream_resume_match(resume_text, job_description):
+                    with preview.container():
+                        display_partial_analysis(results)
+            preview.empty()
+            save_artifact('resume_text', resume_text)
+            save_artifact('job_description', job_description)
+            
+            if results:
+                finish_analysis(results)
+                st.rerun()
+            save_artifact('analysis_results', None)
+    
+    display_job_status()
+
+@st.fragment
+def display_analysis_tab():
+    """Analysis tab, built from figures cached per result"""
+    results = load_artifact('analysis_results')
+    if results:
+        
+        st.header("Resume Analysis Results")
+        
+        # Overall Score Display with custom colors
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.plotly_chart(score_gauge_figure(results['overall_match_score']), use_container_width=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h3>📈 Match Score</h3>
+                <h1 style="font-size: 3rem; margin: 0;">{results['overall_match_score']}%</h1>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Display the score message and summary below the columns
+        score = results['overall_match_score']
+        if score >= 80:
+            color_class = "success-card"
+            message = "Excellent Match! 🎉"
+        elif score >= 60:
+            color_class = "warning-card"
+            message = "Good Match 👍"
+        else:
+            color_class = "error-card"
+            message = "Needs Improvement 📈"
+        
+        st.markdown(f"""
+        <div class="{color_class}">
+            <h3 style="margin-top: 0;">{message}</h3>
+            <p style="margin-bottom: 0;">{results['summary']}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        st.markdown("<div style='margin-bottom: 2rem;'></div>", unsafe_allow_html=True)
+        
+        # Section Scores
+        st.subheader("📋 Section-wise Analysis")
+        if results['section_scores']:
+            st.plotly_chart(section_scores_figure(tuple(results['section_scores'].items())), use_container_width=True)
+        
+        # Skills Analysis
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("✅ Matched Skills")
+            if results['matched_skills']:
+                for skill in results['matched_skills'][:10]:  # Show top 10
+                    st.success(f"• {skill}")
+            else:
+                st.info("No specific skill matches found")
+        
+        with col2:
+            st.subheader("❌ Missing Skills")
+            if results['missing_skills']:
+                for skill in results['missing_skills'][:10]:  # Show top 10
+                    st.error(f"• {skill}")
+            else:
+                st.info("No critical missing skills identified")
+        
+        # Keyword Matches
+        if results['keyword_matches']:
+            st.subheader("🔍 Keyword Analysis")
+            st.dataframe(keywords_table(tuple(results['keyword_matches'][:20])), use_container_width=True)  # Top 20 keywords
+        
+        # Strengths and Weaknesses
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("💪 Strengths")
+            if results['strengths']:
+                for strength in results['strengths']:
+                    st.markdown(f"• **{strength}**")
+            else:
+                st.info("No specific strengths identified")
+        
+        with col2:
+            st.subheader("⚠️ Areas for Improvement")
+            if results['weaknesses']:
+                for weakness in results['weaknesses']:
+                    st.markdown(f"• {weakness}")
+            else:
+                st.info("No major weaknesses identified")
+    
+    else:
+        if st.session_state.artifacts.get('analysis_results'):
+            st.info("⌛ These results were cleared from memory. Run the analysis again to see them.")
+        else:
+            st.info("👆 Please analyze a resume first using the Input tab")
+
+# Generate every section's suggestions in one background call once an analysis finishes;
+# set ATS_PREFETCH_SUGGESTIONS=0 to generate each section only when its button is clicked
+PREFETCH_SUGGESTIONS = os.environ.get("ATS_PREFETCH_SUGGESTIONS", "1") != "0"
+
+@st.fragment(run_every=1)
+def display_prefetch_status(analyzer, resume_text, job_description):
+    """Poll the background suggestions call and rerun the app once it returns suggestions"""
+    if analyzer.prefetch_pending(resume_text, job_description):
+        st.caption("⏳ Generating suggestions in the background...")
+    elif analyzer.prefetch_failed(resume_text, job_description):
+        display_prefetch_failure(analyzer, resume_text, job_description)
+    else:
+        # Rerun the whole script so every section picks up the prefetched suggestions
+        st.rerun()
+
+def display_prefetch_failure(analyzer, resume_text, job_description):
+    """Note that the background suggestions call failed; it is only retried when the user asks"""
+    st.caption("⚠️ Suggestions could not be generated in the background. Generate each section below, or retry.")
+    if st.button("Retry Background Suggestions", key="retry_prefetch"):
+        analyzer.prefetch_suggestions(resume_text, job_description, retry=True)
+        st.rerun()
+
+@st.fragment
+def display_section_suggestions(analyzer, resume_text, job_description, section):
+    """Prefetched suggestions for one section, or a button that generates them and reruns only this expander"""
+    prefetched = analyzer.prefetched_suggestions(resume_text, job_description, section)
+    if prefetched:
+        st.markdown(prefetched)
+    elif st.button(f"Generate {section.title()} Suggestions", key=f"btn_{section}"):
+        # Waits briefly for a prefetch still in progress, then makes its own call
+        st.write_stream(analyzer.stream_resume_suggestions(resume_text, job_description, section))
+
+@st.fragment
+def display_suggestions_tab(analyzer):
+    """Suggestions tab; each section's suggestions are generated in their own fragment"""
+    results = load_artifact('analysis_results')
+    session_resume = load_artifact('resume_text')
+    session_job_description = load_artifact('job_description')
+    if results and session_resume and session_job_description:
+        if PREFETCH_SUGGESTIONS and not results.get('error'):
+            # Runs once per resume and job description; later reruns reuse the same call, even a failed one
+            analyzer.prefetch_suggestions(session_resume, session_job_description)
+        
+        st.header("Improvement Suggestions")
+        
+        # General Recommendations
+        st.subheader("🎯 General Recommendations")
+        if results['recommendations']:
+            for i, rec in enumerate(results['recommendations'], 1):
+                st.markdown(f"**{i}.** {rec}")
+        
+        st.markdown("---")
+        
+        # Section-specific suggestions
+        st.subheader("📝 Section-specific Suggestions")
+        if analyzer.prefetch_pending(session_resume, session_job_description):
+            display_prefetch_status(analyzer, session_resume, session_job_description)
+        elif analyzer.prefetch_failed(session_resume, session_job_description):
+            display_prefetch_failure(analyzer, session_resume, session_job_description)
+        
+        sections = ['experience', 'skills', 'education']
+        
+        for section in sections:
+            with st.expander(f"Improve {section.title()} Section"):
+                display_section_suggestions(analyzer, session_resume, session_job_description, section)
+        
+        # Export Options
+        st.markdown("---")
+        st.subheader("📤 Export Analysis")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("📋 Copy Analysis Summary", use_container_width=True):
+                summary_text = f"""
+                ATS Resume Analysis Summary
+                ===========================
+                Overall Match Score: {results['overall_match_score']}%
+                
+                Summary: {results['summary']}
+                
+                Matched Skills: {', '.join(results['matched_skills'][:5])}
+                Missing Skills: {', '.join(results['missing_skills'][:5])}
+                
+                Top Recommendations:
+                {chr(10).join([f"• {rec}" for rec in results['recommendations'][:3]])}
+                """
+                st.code(summary_text)
+        
+        with col2:
+            csv_data = report_csv(results)
+            
+            st.download_button(
+                label="📥 Download Report (CSV)",
+                data=csv_data,
+                file_name=f"ats_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+    
+    else:
+        st.info("👆 Please complete the analysis first to see suggestions")
+
+JOB_MATCHES_SHOWN = 10
+
+def uploaded_job_text(uploaded):
+    """Text of an uploaded job description file, and an error message if it could not be read"""
+    if uploaded.type == "application/pdf":
+        extraction = PDFProcessor.extract(uploaded)
+        return extraction.text, extraction.message
+    try:
+        return str(uploaded.getvalue(), "utf-8"), ""
+    except UnicodeDecodeError:
+        return None, "The file is not UTF-8 text."
+
+@st.fragment
+def display_job_matching_tab(analyzer):
+    """One resume ranked against many job descriptions; only the best fits are analyzed by the model"""
+    st.header("Job Matching")
+    st.markdown("Rank open roles for one candidate, then analyze the best fits in detail")
+    
+    uploaded_resume = st.file_uploader("Resume (PDF)", type=['pdf'], key="match_resume")
+    uploaded_jobs = st.file_uploader(
+        "Job descriptions",
+        type=['txt', 'pdf'],
+        accept_multiple_files=True,
+        key="match_jobs",
+        help="Upload every open role to compare the resume with, one file per job description"
+    )
+    if not uploaded_resume or not uploaded_jobs:
+        st.info("👆 Upload a resume and the job descriptions to compare it with")
+        return
+    
+    extraction = analyzer.extract_resume(uploaded_resume)
+    if not extraction.ok:
+        st.error(f"❌ Failed to extract text from the resume. {extraction.message}")
+        return
+    if extraction.truncated:
+        st.warning(f"⚠️ {extraction.warning}")
+    resume_text = extraction.text
+    
+    job_descriptions, names = [], []
+    for uploaded in uploaded_jobs:
+        text, error = uploaded_job_text(uploaded)
+        if text:
+            job_descriptions.append(text)
+            names.append(uploaded.name)
+        else:
+            st.warning(f"Skipped {uploaded.name}: {error or 'the file is empty.'}")
+    if not job_descriptions:
+        return
+    
+    # Vectorized once per set of job descriptions; ranking is two matrix products
+    catalog = JobCatalog.build(job_descriptions, names)
+    ranking = catalog.top_jobs(resume_text, JOB_MATCHES_SHOWN)
+    st.subheader(f"🧭 Best fits among {len(catalog)} job(s)")
+    st.dataframe(pd.DataFrame([
+        {'Rank': rank, 'Job': catalog.names[index], 'Local Score': score}
+        for rank, (index, score) in enumerate(ranking, start=1)
+    ]), use_container_width=True, hide_index=True)
+    
+    top_k = st.number_input("Jobs to analyze in detail", min_value=1, max_value=len(catalog),
+                            value=min(3, len(catalog)), step=1)
+    resume_id = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+    if st.button("🔍 Analyze Best Matches", type="primary", use_container_width=True):
+        matches = []
+        with st.spinner(f"Analyzing the {top_k} best-fitting job(s)..."):
+            for index, score, result in analyzer.match_jobs(resume_text, catalog, top_k=int(top_k)):
+                matches.append({'job': catalog.names[index], 'local_score': score, **result})
+        matches.sort(key=lambda match: match['overall_match_score'], reverse=True)
+        save_artifact('job_matches', {'resume_id': resume_id, 'matches': matches})
+    
+    saved = load_artifact('job_matches')
+    if not saved or saved['resume_id'] != resume_id:
+        return
+    st.subheader("📊 Detailed Analysis")
+    for match in saved['matches']:
+        with st.expander(f"{match['job']} · {match['overall_match_score']}% match"):
+            if match.get('error'):
+                st.error(match['summary'])
+                continue
+            st.markdown(match['summary'])
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**✅ Matched Skills:** " + (', '.join(match['matched_skills']) or "none"))
+            with col2:
+                st.markdown("**❌ Missing Skills:** " + (', '.join(match['missing_skills']) or "none"))
+            if match['recommendations']:
+                st.markdown("**💡 Recommendations**")
+                for recommendation in match['recommendations']:
+                    st.markdown(f"• {recommendation}")
+
+LEADERBOARD_PAGE_SIZE = 25
+
+@st.fragment
+def display_leaderboard_tab():
+    """Candidates for one job, sorted, filtered and paged by the results store"""
+    st.header("Candidate Leaderboard")
+    store = get_results_store()
+    jobs = store.jobs()
+    if not jobs:
+        st.info("👆 Analyzed resumes are ranked here, grouped by job description")
+        return
+    
+    job = st.selectbox(
+        "Job description",
+        jobs,
+        format_func=lambda job: f"{job['title']} ({job['candidates']} candidates)"
+    )
+    filter_expression = st.text_input(
+        "Filter",
+        placeholder='score > 70 and missing kubernetes',
+        help='Compare score, experience, education or skills with >, >=, <, <=, = or !=, and test skills with has or missing. Combine with and, or, not and parentheses; quote multi-word skills: has "machine learning".'
+    )
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort = st.selectbox("Sort by", list(SORT_FIELDS), format_func=str.title)
+    with col2:
+        descending = st.toggle("Highest first", value=True)
+    with col3:
+        page = st.number_input("Page", min_value=1, value=1, step=1)
+    
+    try:
+        rows, total = store.leaderboard(job['job_id'], filter_expression, sort=sort, descending=descending,
+                                        limit=LEADERBOARD_PAGE_SIZE, offset=(page - 1) * LEADERBOARD_PAGE_SIZE)
+    except QuerySyntaxError as e:
+        st.error(f"Invalid filter: {str(e)}")
+        return
+    
+    pages = max(1, -(-total // LEADERBOARD_PAGE_SIZE))
+    st.caption(f"{total} matching candidate(s) · page {min(page, pages)} of {pages}")
+    if not rows:
+        return
+    
+    resume_index = get_resume_index()
+    table = []
+    for row in rows:
+        # The search index knows the uploaded file name; otherwise show the resume's first line
+        name = resume_index.name(row['resume_id'])
+        table.append({
+            'Candidate': row['headline'] if name == row['resume_id'] else name,
+            'Score': row['overall_match_score'],
+            'Experience': row['section_scores'].get('experience'),
+            'Education': row['section_scores'].get('education'),
+            'Skills': row['section_scores'].get('skills'),
+            'Missing Skills': ', '.join(row['missing_skills']),
+            'Analyzed': pd.Timestamp(row['analyzed'], unit='s').strftime('%Y-%m-%d %H:%M')
+        })
+    st.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
+
 def main():
     initialize_session_state()
     
@@ -128,6 +817,12 @@ def main():
             st.warning("Please enter your Gemini API key to continue")
             st.markdown("[Get your API key here](https://makersuite.google.com/app/apikey)")
         
+        use_queue = st.checkbox(
+            "Process analyses in background queue",
+            value=True,
+            help="Analyses run in worker processes so a slow model call never blocks the page. Turn off to stream results directly."
+        )
+        
         st.markdown("---")
         st.header("📋 How to use")
         st.markdown("""
@@ -137,325 +832,57 @@ def main():
         4. Click 'Analyze Resume'
         5. Review detailed results
         """)
+        
+        st.markdown("---")
+        st.header("🔎 Search Resumes")
+        resume_index = get_resume_index()
+        search_query = st.text_input(
+            "Skill query",
+            placeholder='python AND (kubernetes OR k8s)',
+            help=f'Boolean search over {len(resume_index)} processed resumes. Supports AND, OR, NOT, parentheses, "quoted phrases" and skills:/experience:/education: fields.'
+        )
+        if search_query:
+            try:
+                matches = resume_index.search(search_query)
+            except QuerySyntaxError as e:
+                st.error(f"Invalid query: {str(e)}")
+            else:
+                st.caption(f"{len(matches)} matching resume(s)")
+                for name in sorted(resume_index.name(doc_id) for doc_id in matches)[:20]:
+                    st.markdown(f"• {name}")
+        
+        st.markdown("---")
+        with st.expander("📈 Metrics (admin)"):
+            display_metrics_panel()
     
     if not api_key:
         st.stop()
     
     # Initialize analyzer
     try:
-        analyzer = GeminiAnalyzer(api_key)
+        analyzer = get_analyzer(api_key)
     except Exception as e:
         st.error(f"Failed to initialize Gemini API: {str(e)}")
         st.stop()
     
     # Main content tabs
-    tab1, tab2, tab3 = st.tabs(["📝 Input", "📊 Analysis", "💡 Suggestions"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📝 Input", "📊 Analysis", "💡 Suggestions", "🏆 Leaderboard",
+                                             "🧭 Job Matching"])
     
     with tab1:
-        st.header("Input Your Data")
-        
-        # Job Description Input
-        st.subheader("Job Description")
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            job_desc_method = st.radio(
-                "How would you like to input the job description?",
-                ["Paste Text", "Upload File"],
-                horizontal=True
-            )
-        
-        if job_desc_method == "Paste Text":
-            job_description = st.text_area(
-                "Paste the job description here:",
-                height=200,
-                placeholder="Paste the complete job description..."
-            )
-        else:
-            uploaded_jd = st.file_uploader(
-                "Upload job description file",
-                type=['txt', 'pdf'],
-                help="Upload a text or PDF file containing the job description"
-            )
-            job_description = ""
-            
-            if uploaded_jd:
-                if uploaded_jd.type == "application/pdf":
-                    job_description = PDFProcessor.extract_text_from_pdf(uploaded_jd)
-                else:
-                    job_description = str(uploaded_jd.read(), "utf-8")
-        
-        st.markdown("---")
-        
-        # Resume Upload
-        st.subheader("Resume Upload")
-        uploaded_resume = st.file_uploader(
-            "Upload your resume (PDF only)",
-            type=['pdf'],
-            help="Upload your resume in PDF format"
-        )
-        
-        resume_text = ""
-        if uploaded_resume:
-            with st.spinner("Processing resume..."):
-                resume_text = PDFProcessor.extract_text_from_pdf(uploaded_resume)
-                
-            if resume_text:
-                st.success("✅ Resume processed successfully!")
-                with st.expander("Preview extracted text"):
-                    st.text_area("Extracted text:", resume_text[:1000] + "..." if len(resume_text) > 1000 else resume_text, height=200)
-            else:
-                st.error("❌ Failed to extract text from PDF. Please try a different file.")
-        
-        # Analysis button
-        st.markdown("---")
-        if st.button("🔍 Analyze Resume", type="primary", use_container_width=True):
-            if not job_description or not resume_text:
-                st.error("Please provide both job description and resume before analyzing.")
-            else:
-                with st.spinner("Analyzing resume match... This may take a few moments."):
-                    st.session_state.analysis_results = analyzer.analyze_resume_match(resume_text, job_description)
-                    st.session_state.resume_text = resume_text
-                    st.session_state.job_description = job_description
-                
-                if st.session_state.analysis_results:
-                    st.success("✅ Analysis completed! Check the Analysis tab for results.")
-                    st.balloons()
+        display_input_tab(analyzer, api_key, use_queue)
     
     with tab2:
-        if st.session_state.analysis_results:
-            results = st.session_state.analysis_results
-            
-            st.header("Resume Analysis Results")
-            
-            # Overall Score Display with custom colors
-            col1, col2 = st.columns([2, 1])
-            with col1:
-                # Enhanced gauge with custom colors
-                fig = go.Figure(go.Indicator(
-                    mode = "gauge+number+delta",
-                    value = results['overall_match_score'],
-                    domain = {'x': [0, 1], 'y': [0, 1]},
-                    title = {'text': "Overall Match Score", 'font': {'size': 20, 'color': '#EEFAFF'}},
-                    delta = {'reference': 70, 'increasing': {'color': "#28a745"}, 'decreasing': {'color': "#dc3545"}},
-                    gauge = {
-                        'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "#EEFAFF"},
-                        'bar': {'color': "#262626"},
-                        'bgcolor': "white",
-                        'borderwidth': 2,
-                        'bordercolor': "#230C0F",
-                        'steps': [
-                            {'range': [0, 30], 'color': "#FF8684"},
-                            {'range': [30, 60], 'color': "#FFFF7B"},
-                            {'range': [60, 80], 'color': "#96EB96"},
-                            {'range': [80, 100], 'color': "#4ECD65"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "#230C0F", 'width': 4},
-                            'thickness': 0.75,
-                            'value': 90
-                        }
-                    }
-                ))
-                fig.update_layout(
-                    height=300,
-                    font={'color': "#EEFAFF", 'family': "Arial"},
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)"
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col2:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>📈 Match Score</h3>
-                    <h1 style="font-size: 3rem; margin: 0;">{results['overall_match_score']}%</h1>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Display the score message and summary below the columns
-            score = results['overall_match_score']
-            if score >= 80:
-                color_class = "success-card"
-                message = "Excellent Match! 🎉"
-            elif score >= 60:
-                color_class = "warning-card"
-                message = "Good Match 👍"
-            else:
-                color_class = "error-card"
-                message = "Needs Improvement 📈"
-            
-            st.markdown(f"""
-            <div class="{color_class}">
-                <h3 style="margin-top: 0;">{message}</h3>
-                <p style="margin-bottom: 0;">{results['summary']}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            st.markdown("<div style='margin-bottom: 2rem;'></div>", unsafe_allow_html=True)
-            
-            # Section Scores
-            st.subheader("📋 Section-wise Analysis")
-            if results['section_scores']:
-                sections = list(results['section_scores'].keys())
-                scores = list(results['section_scores'].values())
-                
-                # Create colorful bar chart
-                colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
-                
-                fig = go.Figure(data=[
-                    go.Bar(
-                        x=sections,
-                        y=scores,
-                        marker_color=colors[:len(sections)],
-                        text=scores,
-                        textposition='auto',
-                        textfont=dict(color='white', size=14, family='Arial Black')
-                    )
-                ])
-                
-                fig.update_layout(
-                    title={
-                        'text': 'Section Performance Analysis',
-                        'x': 0.5,
-                        'font': {'size': 20, 'color': '#2E86AB'}
-                    },
-                    xaxis_title="Resume Sections",
-                    yaxis_title="Match Score (%)",
-                    height=400,
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    font={'color': '#2E86AB'},
-                    yaxis=dict(range=[0, 100])
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Skills Analysis
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("✅ Matched Skills")
-                if results['matched_skills']:
-                    for skill in results['matched_skills'][:10]:  # Show top 10
-                        st.success(f"• {skill}")
-                else:
-                    st.info("No specific skill matches found")
-            
-            with col2:
-                st.subheader("❌ Missing Skills")
-                if results['missing_skills']:
-                    for skill in results['missing_skills'][:10]:  # Show top 10
-                        st.error(f"• {skill}")
-                else:
-                    st.info("No critical missing skills identified")
-            
-            # Keyword Matches
-            if results['keyword_matches']:
-                st.subheader("🔍 Keyword Analysis")
-                keywords_df = pd.DataFrame({
-                    'Keywords': results['keyword_matches'][:20],  # Top 20 keywords
-                    'Status': ['Matched'] * len(results['keyword_matches'][:20])
-                })
-                st.dataframe(keywords_df, use_container_width=True)
-            
-            # Strengths and Weaknesses
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("💪 Strengths")
-                if results['strengths']:
-                    for strength in results['strengths']:
-                        st.markdown(f"• **{strength}**")
-                else:
-                    st.info("No specific strengths identified")
-            
-            with col2:
-                st.subheader("⚠️ Areas for Improvement")
-                if results['weaknesses']:
-                    for weakness in results['weaknesses']:
-                        st.markdown(f"• {weakness}")
-                else:
-                    st.info("No major weaknesses identified")
-        
-        else:
-            st.info("👆 Please analyze a resume first using the Input tab")
-
-
+        display_analysis_tab()
     
     with tab3:
-        if st.session_state.analysis_results and st.session_state.resume_text and st.session_state.job_description:
-            st.header("Improvement Suggestions")
-            
-            # General Recommendations
-            st.subheader("🎯 General Recommendations")
-            if st.session_state.analysis_results['recommendations']:
-                for i, rec in enumerate(st.session_state.analysis_results['recommendations'], 1):
-                    st.markdown(f"**{i}.** {rec}")
-            
-            st.markdown("---")
-            
-            # Section-specific suggestions
-            st.subheader("📝 Section-specific Suggestions")
-            
-            sections = ['experience', 'skills', 'education']
-            
-            for section in sections:
-                with st.expander(f"Improve {section.title()} Section"):
-                    if st.button(f"Generate {section.title()} Suggestions", key=f"btn_{section}"):
-                        with st.spinner(f"Generating {section} suggestions..."):
-                            suggestions = analyzer.generate_resume_suggestions(
-                                st.session_state.resume_text,
-                                st.session_state.job_description,
-                                section
-                            )
-                            st.markdown(suggestions)
-            
-            # Export Options
-            st.markdown("---")
-            st.subheader("📤 Export Analysis")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if st.button("📋 Copy Analysis Summary", use_container_width=True):
-                    summary_text = f"""
-                    ATS Resume Analysis Summary
-                    ===========================
-                    Overall Match Score: {st.session_state.analysis_results['overall_match_score']}%
-                    
-                    Summary: {st.session_state.analysis_results['summary']}
-                    
-                    Matched Skills: {', '.join(st.session_state.analysis_results['matched_skills'][:5])}
-                    Missing Skills: {', '.join(st.session_state.analysis_results['missing_skills'][:5])}
-                    
-                    Top Recommendations:
-                    {chr(10).join([f"• {rec}" for rec in st.session_state.analysis_results['recommendations'][:3]])}
-                    """
-                    st.code(summary_text)
-            
-            with col2:
-                # Create downloadable report
-                analysis_data = {
-                    'Analysis Date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'Overall Score': st.session_state.analysis_results['overall_match_score'],
-                    'Summary': st.session_state.analysis_results['summary'],
-                    'Matched Skills': ', '.join(st.session_state.analysis_results['matched_skills']),
-                    'Missing Skills': ', '.join(st.session_state.analysis_results['missing_skills']),
-                    'Recommendations': '\n'.join(st.session_state.analysis_results['recommendations'])
-                }
-                
-                df_report = pd.DataFrame([analysis_data])
-                csv_data = df_report.to_csv(index=False)
-                
-                st.download_button(
-                    label="📥 Download Report (CSV)",
-                    data=csv_data,
-                    file_name=f"ats_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-        
-        else:
-            st.info("👆 Please complete the analysis first to see suggestions")
+        display_suggestions_tab(analyzer)
+    
+    with tab4:
+        display_leaderboard_tab()
+    
+    with tab5:
+        display_job_matching_tab(analyzer)
 
 if __name__ == "__main__":
     main()
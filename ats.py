@@ -0,0 +1,171 @@
+"""Headless command line interface for batch resume screening.
+
+    python ats.py analyze --jd jd.pdf resumes/*.pdf --jobs 8 --out results.jsonl
+    python ats.py analyze --jd jd.pdf resumes/*.pdf --export results.parquet
+    python ats.py match --resume cv.pdf openings/*.txt --top-k 3
+
+Only the standard library is imported at start-up; PDF, model and numeric
+libraries load when a command actually needs them.
+"""
+import argparse
+import json
+import logging
+import sys
+
+
+def load_env() -> None:
+    """Load a .env file into the environment when python-dotenv is installed"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def analyze(args: argparse.Namespace) -> int:
+    from utils.pipeline import analyze_resumes, load_document
+
+    job_description = load_document(args.jd)
+    exporter = None
+    if args.export:
+        from utils.exporter import ResultExporter
+        exporter = ResultExporter(args.export)
+    # With --export alone the table is the only output
+    out = open(args.out, "w", encoding="utf-8") if args.out else (None if exporter else sys.stdout)
+    count = 0
+    try:
+        for record in analyze_resumes(args.resumes, job_description, api_key=args.api_key,
+                                      max_workers=args.jobs, top_k=args.top_k,
+                                      use_cache=not args.no_cache):
+            if out is not None:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if exporter is not None:
+                exporter.write(record)
+            count += 1
+            print(f"[{count}] {record['resume']}: {record['overall_match_score']}", file=sys.stderr)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+        if exporter is not None:
+            exporter.close()
+    return 0
+
+
+def match(args: argparse.Namespace) -> int:
+    from utils.pipeline import match_jobs, rank_jobs
+
+    # The local ranking needs no API key and is printed first
+    for rank, job in enumerate(rank_jobs(args.resume, args.job_descriptions, limit=args.show), start=1):
+        print(f"{rank:>3}. {job['local_score']:>5.1f}  {job['job']}", file=sys.stderr)
+    if args.local_only:
+        return 0
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for record in match_jobs(args.resume, args.job_descriptions, api_key=args.api_key, top_k=args.top_k,
+                                 max_workers=args.jobs, use_cache=not args.no_cache):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            print(f"{record['job']}: {record['overall_match_score']}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def worker(args: argparse.Namespace) -> int:
+    import os
+    import time
+    from utils.job_queue import WorkerPool
+
+    api_key = args.api_key or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("A Gemini API key is required; pass --api-key or set GOOGLE_API_KEY")
+
+    pool = WorkerPool(api_key, processes=args.processes)
+    print(f"Started {args.processes} worker(s); press Ctrl-C to stop", file=sys.stderr)
+    try:
+        while pool.alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+    return 0
+
+
+def metrics(args: argparse.Namespace) -> int:
+    from utils.metrics import get_store
+
+    store = get_store()
+    if store is None:
+        raise ValueError("Metrics are disabled (ATS_METRICS=0)")
+    if args.out:
+        store.write_prometheus(args.out)
+    else:
+        sys.stdout.write(store.prometheus_text())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ats", description="ATS resume analyzer")
+    parser.add_argument("--log-metrics", action="store_true",
+                        help="Log stage timings, token counts and cache hits as JSON lines on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_parser = commands.add_parser("analyze", help="Screen resume PDFs against a job description")
+    analyze_parser.add_argument("resumes", nargs="+", help="Resume PDF files")
+    analyze_parser.add_argument("--jd", required=True, help="Job description file (.pdf or text)")
+    analyze_parser.add_argument("--jobs", type=int, default=8, help="Concurrent model calls (default: 8)")
+    analyze_parser.add_argument("--out", help="Write JSON lines here instead of stdout")
+    analyze_parser.add_argument("--export", help="Also write a flat table of the results for reporting; "
+                                                 "the format follows the extension (.csv, .jsonl or .parquet)")
+    analyze_parser.add_argument("--top-k", type=int, help="Only send the K best locally pre-ranked resumes to the model")
+    analyze_parser.add_argument("--api-key", help="Gemini API key (default: GOOGLE_API_KEY)")
+    analyze_parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    analyze_parser.set_defaults(handler=analyze)
+
+    match_parser = commands.add_parser("match", help="Find the job descriptions that best fit one resume")
+    match_parser.add_argument("job_descriptions", nargs="+", help="Job description files (.pdf or text)")
+    match_parser.add_argument("--resume", required=True, help="Resume file (.pdf or text)")
+    match_parser.add_argument("--top-k", type=int, default=3,
+                              help="Analyze the K best-fitting jobs with the model (default: 3)")
+    match_parser.add_argument("--show", type=int, default=10, help="Jobs listed in the local ranking (default: 10)")
+    match_parser.add_argument("--local-only", action="store_true",
+                              help="Only print the local ranking; no model calls or API key needed")
+    match_parser.add_argument("--jobs", type=int, default=3, help="Concurrent model calls (default: 3)")
+    match_parser.add_argument("--out", help="Write JSON lines here instead of stdout")
+    match_parser.add_argument("--api-key", help="Gemini API key (default: GOOGLE_API_KEY)")
+    match_parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    match_parser.set_defaults(handler=match)
+
+    worker_parser = commands.add_parser("worker", help="Run worker processes that drain the analysis job queue")
+    worker_parser.add_argument("--processes", type=int, default=2, help="Number of worker processes (default: 2)")
+    worker_parser.add_argument("--api-key", help="Gemini API key (default: GOOGLE_API_KEY)")
+    worker_parser.set_defaults(handler=worker)
+
+    metrics_parser = commands.add_parser("metrics", help="Print collected metrics in Prometheus text format")
+    metrics_parser.add_argument("--out", help="Atomically write the metrics to this file instead of stdout")
+    metrics_parser.set_defaults(handler=metrics)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    load_env()
+    if args.log_metrics:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger = logging.getLogger("utils.metrics")
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(logging.INFO)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Micro-benchmark for PDFProcessor.clean_text and extract_sections.
+
+Compares the current implementations against the previous multi-regex
+versions on synthetic resumes of increasing length.
+
+    python benchmarks/bench_sections.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_processor import PDFProcessor
+
+
+def legacy_clean_text(text: str) -> str:
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\.\,\-\(\)\@]', '', text)
+    text = re.sub(r'Page \d+', '', text)
+    return text.strip()
+
+
+def legacy_extract_sections(resume_text: str) -> dict:
+    sections = {'experience': '', 'education': '', 'skills': '', 'full_text': resume_text}
+    patterns = {
+        'experience': [
+            r'(experience|work experience|employment|professional experience)(.*?)(?=education|skills|projects|$)',
+            r'(employment history|work history)(.*?)(?=education|skills|projects|$)'
+        ],
+        'education': [r'(education|academic background|qualifications)(.*?)(?=experience|skills|projects|$)'],
+        'skills': [r'(skills|technical skills|core competencies|technologies)(.*?)(?=experience|education|projects|$)']
+    }
+    text_lower = resume_text.lower()
+    for section, section_patterns in patterns.items():
+        for pattern in section_patterns:
+            match = re.search(pattern, text_lower, re.DOTALL | re.IGNORECASE)
+            if match:
+                sections[section] = match.group(2).strip()
+                break
+    return sections
+
+
+def synthetic_resume(publications: int) -> str:
+    """A resume whose publication list makes up most of its length"""
+    header = (
+        "Jane Doe\njane.doe@example.com | (555) 010-0100\n"
+        "PROFESSIONAL EXPERIENCE\n"
+        + "Senior Engineer, Acme Corp. Built data pipelines in Python and Spark; mentored 6 engineers.\n" * 20
+        + "EDUCATION\nPhD Computer Science, State University\n"
+        "TECHNICAL SKILLS\nPython, Kubernetes, Docker, AWS, PostgreSQL\n"
+        "PUBLICATIONS\n"
+    )
+    publication = ("J. Doe, A. Smith. Scalable retrieval for ranking candidates. "
+                   "Proceedings of the Conference on Data Systems, pp. 12-24. Page {page}\n")
+    return header + "".join(publication.format(page=i) for i in range(publications))
+
+
+def bench(label: str, func, text: str, number: int) -> float:
+    seconds = min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+    return seconds * 1000
+
+
+def main():
+    print(f"{'resume':>22} {'chars':>9} {'step':>16} {'legacy ms':>10} {'new ms':>9} {'speedup':>8}")
+    for publications in (10, 200, 2000):
+        raw = synthetic_resume(publications)
+        cleaned = PDFProcessor.clean_text(raw)
+        number = max(1, 2000 // publications)
+        rows = [
+            ("clean_text", legacy_clean_text, PDFProcessor.clean_text, raw),
+            ("extract_sections", legacy_extract_sections, PDFProcessor.extract_sections, cleaned),
+        ]
+        for step, legacy, current, text in rows:
+            legacy_ms = bench(step, legacy, text, number)
+            current_ms = bench(step, current, text, number)
+            print(f"{publications:>10} publications {len(text):>9} {step:>16} "
+                  f"{legacy_ms:>10.3f} {current_ms:>9.3f} {legacy_ms / current_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Synthetic resumes, job descriptions and PDFs for benchmarks.
+
+Everything is generated from a seed so runs are repeatable, and PDFs are
+written directly so no PDF-authoring library is needed.
+"""
+import random
+from typing import List
+
+SKILLS = ["Python", "SQL", "Spark", "Kubernetes", "Docker", "AWS", "GCP", "Terraform",
+          "PostgreSQL", "Kafka", "Airflow", "React", "TypeScript", "Go", "Java", "Pandas"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Launched", "Scaled"]
+THINGS = ["data pipelines", "a billing service", "the search platform", "CI/CD workflows",
+          "an ML feature store", "customer dashboards", "the ingestion layer", "REST APIs"]
+
+LINES_PER_PAGE = 50
+
+
+def resume_lines(pages: int, seed: int = 0) -> List[str]:
+    """Lines of a resume roughly pages pages long"""
+    rng = random.Random(seed)
+    lines = [
+        f"Candidate {seed}",
+        f"candidate{seed}@example.com | (555) 010-{seed % 10000:04d}",
+        "PROFESSIONAL EXPERIENCE",
+    ]
+    target = pages * LINES_PER_PAGE - 6
+    while len(lines) < target:
+        if rng.random() < 0.1:
+            lines.append(f"Senior Engineer, Company {rng.randint(1, 500)} ({rng.randint(2010, 2024)})")
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(THINGS)} with {rng.choice(SKILLS)} "
+                     f"and {rng.choice(SKILLS)}, improving throughput {rng.randint(5, 90)}%")
+    lines += [
+        "EDUCATION",
+        "B.S. Computer Science, State University",
+        "TECHNICAL SKILLS",
+        ", ".join(rng.sample(SKILLS, 8)),
+    ]
+    return lines
+
+
+def resume_text(pages: int, seed: int = 0) -> str:
+    return "\n".join(resume_lines(pages, seed))
+
+
+def job_description(seed: int = 0) -> str:
+    rng = random.Random(seed)
+    required = rng.sample(SKILLS, 6)
+    return "\n".join([
+        "Senior Data Engineer",
+        "About the role: you will design and operate the data platform behind our products.",
+        "Requirements:",
+        *[f"- {years}+ years of experience with {skill}" for years, skill in zip(range(2, 8), required)],
+        "- Experience leading projects across teams",
+        "Nice to have: " + ", ".join(rng.sample(SKILLS, 3)),
+        "We are an equal opportunity employer. Apply now!",
+    ])
+
+
+def make_pdf(lines: List[str]) -> bytes:
+    """A minimal text PDF with LINES_PER_PAGE lines per page"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    count = len(pages)
+    font = 3 + 2 * count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(count)), count),
+    ]
+    for i, page in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>")
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page)
+        stream = "\n".join(["BT /F1 10 Tf 14 TL 40 760 Td", *(f"({line}) Tj T*" for line in escaped), "ET"])
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer << /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode("latin-1")
+    return bytes(out)
+
+
+def resume_pdf(pages: int, seed: int = 0) -> bytes:
+    return make_pdf(resume_lines(pages, seed))
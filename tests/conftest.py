@@ -0,0 +1,17 @@
+import os
+import shutil
+import tempfile
+
+# Cache paths and ATS_METRICS are read when the utils modules are imported, so
+# they are set before collection imports any test module; tests that need a
+# store of their own still build it under tmp_path
+_cache_dir = tempfile.mkdtemp(prefix="ats-tests-")
+
+
+def pytest_configure(config):
+    os.environ["ATS_CACHE_DIR"] = _cache_dir
+    os.environ["ATS_METRICS"] = "0"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_cache_dir, ignore_errors=True)
@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+
+from utils.gemini_analyzer import GeminiAnalyzer
+from utils.pdf_processor import ExtractionResult, PDFProcessor
+
+
+def test_str_pdf_paths_are_extracted_and_other_strings_are_resume_text(monkeypatch, tmp_path):
+    extracted = []
+
+    def extract(pdf_file, *args, **kwargs):
+        extracted.append(pdf_file)
+        return ExtractionResult("Jane Doe")
+
+    monkeypatch.setattr(PDFProcessor, "extract", staticmethod(extract))
+    saved = tmp_path / "resume"
+    saved.write_bytes(b"%PDF-1.4\n")
+
+    assert GeminiAnalyzer._extract_resume("resumes/jane.PDF").text == "Jane Doe"
+    assert GeminiAnalyzer._extract_resume(str(saved)).text == "Jane Doe"
+    assert GeminiAnalyzer._extract_resume(Path("jane.pdf")).text == "Jane Doe"
+    assert GeminiAnalyzer._extract_resume("Jane Doe\nPython developer").text == "Jane Doe\nPython developer"
+    assert GeminiAnalyzer._extract_resume("Python developer").text == "Python developer"
+    assert extracted == ["resumes/jane.PDF", str(saved), Path("jane.pdf")]
+
+
+def test_section_suggestions_do_not_wait_long_for_a_queued_prefetch(monkeypatch):
+    import threading
+
+    from utils import gemini_analyzer
+    from utils.model_backend import FakeBackend
+
+    class StalledPrefetchBackend(FakeBackend):
+        """Answers section prompts at once but holds the combined JSON call until released"""
+        release = threading.Event()
+
+        def generate_content(self, prompt, json_output=False, **kwargs):
+            if json_output:
+                self.release.wait(10)
+            return super().generate_content(prompt, json_output=json_output, **kwargs)
+
+    monkeypatch.setattr(gemini_analyzer, "PREFETCH_WAIT", 0.1)
+    analyzer = GeminiAnalyzer("test-key", backend=StalledPrefetchBackend())
+    try:
+        analyzer.prefetch_suggestions("Jane Doe\nSkills\nPython", "Python developer")
+        assert analyzer.prefetch_pending("Jane Doe\nSkills\nPython", "Python developer")
+
+        suggestions = analyzer.generate_resume_suggestions("Jane Doe\nSkills\nPython", "Python developer", "skills")
+        assert suggestions.startswith("1.")
+    finally:
+        StalledPrefetchBackend.release.set()
+
+
+def test_batch_resumes_are_indexed_under_their_file_names(monkeypatch, tmp_path):
+    from utils.model_backend import FakeBackend
+    from utils.resume_index import ResumeIndex
+
+    monkeypatch.setattr(PDFProcessor, "extract", staticmethod(
+        lambda pdf_file, *args, **kwargs: ExtractionResult("Jane Doe\nSkills\nPython, Kubernetes")))
+    index = ResumeIndex(str(tmp_path / "resume_index.sqlite3"))
+    analyzer = GeminiAnalyzer("test-key", backend=FakeBackend(), resume_index=index)
+
+    resumes = ["resumes/jane.pdf", "John Roe\nSkills\nJava"]
+    results = dict(analyzer.analyze_batch(resumes, "Python developer with Kubernetes", max_workers=2))
+
+    assert not any(result.get("error") for result in results.values())
+    assert [index.name(doc_id) for doc_id in index.search("skills:kubernetes")] == ["jane.pdf"]
+    assert len(index.search("java")) == 1
+
+
+def test_skills_with_symbols_match_in_cleaned_resume_text():
+    from utils.prompt_builder import PromptBuilder
+
+    profile = PromptBuilder().job_profile("Requirements: C++, C#, CI/CD pipelines, TCP/IP and PL/SQL")
+    resume_text = PDFProcessor.clean_text("Skills: C++, C#, CI/CD, TCP/IP, PL/SQL, Python")
+    report = GeminiAnalyzer._skill_report(resume_text, profile)
+
+    assert report["matched_skills"] == ["C++", "C#", "CI/CD", "Networking", "Oracle Database"]
+    assert report["missing_skills"] == []
+    assert {"c++", "c#"} <= set(report["keyword_matches"])
+
+
+def test_failed_prefetch_is_only_retried_when_asked():
+    from utils.model_backend import FakeBackend, FakeResponse
+
+    class UnparseableBackend(FakeBackend):
+        """Answers the combined suggestions call with text that is not JSON"""
+
+        def generate_content(self, prompt, stream=False, json_output=False, **kwargs):
+            self.calls += 1
+            return FakeResponse("Sorry, I cannot help with that.")
+
+    backend = UnparseableBackend()
+    analyzer = GeminiAnalyzer("test-key", backend=backend)
+    resume_text, job_description = "Jane Doe\nSkills\nGo", "Go developer"
+
+    analyzer.prefetch_suggestions(resume_text, job_description).result(timeout=5)
+    assert analyzer.prefetch_failed(resume_text, job_description)
+    analyzer.prefetch_suggestions(resume_text, job_description).result(timeout=5)
+    assert backend.calls == 1
+
+    analyzer.prefetch_suggestions(resume_text, job_description, retry=True).result(timeout=5)
+    assert backend.calls == 2
+
+
+def test_backend_without_generate_content_fails_on_creation():
+    from utils.model_backend import ModelBackend
+
+    class IncompleteBackend(ModelBackend):
+        model_name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
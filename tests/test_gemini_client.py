@@ -0,0 +1,101 @@
+import pytest
+
+from utils.gemini_client import CircuitBreaker, CircuitOpenError, GeminiClient, RequestScheduler, SharedQuota
+
+
+class ClientError(Exception):
+    """A non-retryable API error such as 400 invalid argument"""
+    code = 400
+
+
+class ServerError(Exception):
+    code = 503
+
+
+class ScriptedModel:
+    """Raises the given errors in order, then answers "ok\""""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def open_breaker() -> CircuitBreaker:
+    # reset_timeout=0 makes the breaker half-open as soon as it has opened
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+def client_for(model, breaker) -> GeminiClient:
+    return GeminiClient(model, RequestScheduler(10 ** 6, 10 ** 9), breaker, max_retries=0, base_delay=0.0)
+
+
+def test_non_retryable_error_on_half_open_probe_frees_the_probe_without_closing():
+    breaker = open_breaker()
+    model = ScriptedModel(ClientError("invalid argument"))
+    client = client_for(model, breaker)
+
+    with pytest.raises(ClientError):
+        client.generate_content("prompt")
+
+    assert breaker.state == "half-open"
+    assert client.generate_content("prompt") == "ok"
+    assert breaker.state == "closed"
+    assert model.calls == 2
+
+
+def test_non_retryable_errors_do_not_reset_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+    client = client_for(ScriptedModel(ServerError(), ClientError(), ServerError(), ClientError(), ServerError()),
+                        breaker)
+
+    for error in (ServerError, ClientError, ServerError, ClientError, ServerError):
+        with pytest.raises(error):
+            client.generate_content("prompt")
+
+    assert breaker.state == "open"
+
+
+def test_retryable_error_on_half_open_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = client_for(ScriptedModel(ServerError("unavailable")), breaker)
+
+    with pytest.raises(ServerError):
+        client.generate_content("prompt")
+
+    # A failed probe reopens the circuit; with a longer timeout the next call is rejected
+    breaker.reset_timeout = 60.0
+    with pytest.raises(CircuitOpenError):
+        client.generate_content("prompt")
+
+
+def test_interrupted_probe_releases_the_probe_slot():
+    breaker = open_breaker()
+    client = client_for(ScriptedModel(KeyboardInterrupt()), breaker)
+
+    with pytest.raises(KeyboardInterrupt):
+        client.generate_content("prompt")
+
+    assert client.generate_content("prompt") == "ok"
+
+
+def test_shared_quota_is_drawn_down_by_every_holder(tmp_path):
+    path = str(tmp_path / "rate_limits.sqlite3")
+    # Two handles on one database stand in for the app and a queue worker
+    app = SharedQuota("key", requests_per_minute=2, tokens_per_minute=1000, path=path)
+    worker = SharedQuota("key", requests_per_minute=2, tokens_per_minute=1000, path=path)
+
+    assert app.try_acquire(100) == 0
+    assert worker.try_acquire(100) == 0
+    # Both requests of the minute are spent, so a third waits about 30 seconds for a refill
+    assert app.try_acquire(100) == pytest.approx(30.0, abs=1.0)
+    # Another key has its own quota
+    assert SharedQuota("other", 2, 1000, path=path).try_acquire(100) == 0
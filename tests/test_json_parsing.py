@@ -0,0 +1,43 @@
+import pytest
+
+from utils.json_parsing import IncrementalJSONParser, parse_json_object
+
+
+def test_object_is_extracted_from_prose_and_code_fences():
+    text = 'Here is the analysis:\n```json\n{"overall_match_score": 72, "summary": "Solid fit"}\n```\nThanks!'
+
+    assert parse_json_object(text) == {"overall_match_score": 72, "summary": "Solid fit"}
+
+
+def test_trailing_commas_and_raw_control_characters_are_repaired():
+    text = '{"strengths": ["Python", "SQL",], "summary": "Line one\nLine\ttwo",}'
+
+    assert parse_json_object(text) == {"strengths": ["Python", "SQL"], "summary": "Line one\nLine\ttwo"}
+
+
+def test_mismatched_closing_bracket_is_repaired():
+    assert parse_json_object('{"strengths": ["Python", "SQL"}') == {"strengths": ["Python", "SQL"]}
+
+
+def test_truncated_object_keeps_its_complete_fields():
+    text = '{"overall_match_score": 72, "strengths": ["Python", "Kuber'
+
+    assert parse_json_object(text) == {"overall_match_score": 72, "strengths": ["Python", "Kuber"]}
+    assert parse_json_object('{"overall_match_score": 72, "summary":') == {"overall_match_score": 72,
+                                                                              "summary": None}
+
+
+def test_text_without_an_object_raises():
+    with pytest.raises(ValueError):
+        parse_json_object("Sorry, I cannot help with that.")
+    with pytest.raises(ValueError):
+        parse_json_object('["not", "an", "object"]')
+
+
+def test_incremental_parser_reports_fields_as_they_complete():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('```json\n{"overall_match_score": 7') == {}
+    assert parser.feed('2, "summary": "a, b",') == {"overall_match_score": 72, "summary": "a, b"}
+    assert parser.feed(' "section_scores": {"skills": 65}}') == {"section_scores": {"skills": 65}}
+    assert parser.done
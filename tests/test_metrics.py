@@ -0,0 +1,39 @@
+from utils.metrics import HIT_BATCH_SIZE, MetricsStore, Trace
+
+
+def finished_trace(hit: bool) -> Trace:
+    trace = Trace("extraction")
+    trace.cache["extraction"] = hit
+    trace.finish()
+    return trace
+
+
+def stored_traces(store: MetricsStore) -> int:
+    return store._conn.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+
+
+def test_cache_hits_are_written_in_batches(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"))
+
+    for _ in range(HIT_BATCH_SIZE - 1):
+        store.record(finished_trace(hit=True))
+    assert stored_traces(store) == 0
+
+    store.record(finished_trace(hit=True))
+    assert stored_traces(store) == HIT_BATCH_SIZE
+
+
+def test_misses_are_written_at_once_with_buffered_hits(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"))
+
+    store.record(finished_trace(hit=True))
+    store.record(finished_trace(hit=False))
+    assert stored_traces(store) == 2
+
+
+def test_reads_include_buffered_hits(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"))
+
+    store.record(finished_trace(hit=True))
+    assert len(store.recent()) == 1
+    assert store.counters()["ats_cache_requests_total"]['cache="extraction",result="hit"'] == 1
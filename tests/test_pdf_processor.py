@@ -0,0 +1,83 @@
+import pytest
+
+from utils import pdf_processor
+from utils.pdf_processor import ENCRYPTED, ExtractionResult, PDFProcessor
+
+PDF = b"%PDF-1.4\n% test document\n"
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Replace parsing with a queue of results and count how often it runs"""
+    calls = []
+
+    def parse(data, workers, max_pages, time_budget):
+        calls.append(data)
+        return results.pop(0)
+
+    results = []
+    pdf_processor._extraction_cache.clear()
+    monkeypatch.setattr(PDFProcessor, "_parse_pdf", staticmethod(parse))
+    yield results, calls
+    pdf_processor._extraction_cache.clear()
+
+
+def test_transient_failure_is_retried_on_the_next_extraction(parses):
+    results, calls = parses
+    results.extend([ExtractionResult(None, "timeout"), ExtractionResult("Jane Doe")])
+
+    assert PDFProcessor.extract(PDF).failure == "timeout"
+    assert PDFProcessor.extract(PDF).text == "Jane Doe"
+    assert PDFProcessor.extract(PDF).text == "Jane Doe"
+    assert len(calls) == 2
+
+
+def test_deterministic_failure_is_cached(parses):
+    results, calls = parses
+    results.append(ExtractionResult(None, ENCRYPTED))
+
+    assert PDFProcessor.extract(PDF).failure == ENCRYPTED
+    assert PDFProcessor.extract(PDF).failure == ENCRYPTED
+    assert len(calls) == 1
+
+
+def test_sections_are_found_in_cleaned_single_line_text():
+    text = PDFProcessor.clean_text("Jane Doe\nExperience\nAcme Corp, mentored junior engineers\n"
+                                   "Education\nB.S. Computer Science\nSkills\nPython, SQL")
+    sections = PDFProcessor.extract_sections(text)
+
+    assert sections['experience'] == "acme corp, mentored junior engineers"
+    assert sections['education'] == "b.s. computer science"
+    assert sections['skills'] == "python, sql"
+
+
+def test_keyword_continuing_a_sentence_is_not_a_heading():
+    sections = PDFProcessor.extract_sections("Summary 5 years of Experience in data. Education MIT")
+
+    assert sections['experience'] == ""
+    assert sections['education'] == "mit"
+
+
+def test_truncated_extraction_is_not_cached(parses):
+    results, calls = parses
+    results.extend([ExtractionResult("Jane Doe", truncated=True), ExtractionResult("Jane Doe Python")])
+
+    first = PDFProcessor.extract(PDF)
+    assert first.truncated and first.warning
+    assert PDFProcessor.extract(PDF).text == "Jane Doe Python"
+    assert PDFProcessor.extract(PDF).text == "Jane Doe Python"
+    assert len(calls) == 2
+
+
+def test_clean_text_matches_the_previous_implementation():
+    import re
+
+    def legacy_clean_text(text):
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'[^\w\s\.\,\-\(\)\@]', '', text)
+        text = re.sub(r'Page \d+', '', text)
+        return text.strip()
+
+    for text in ("Page #3 ok", "Jane Doe\n\tjane@example.com • (555) 010-0100\nPage 2",
+                 "Built APIs — 40% faster! Page\n7 of 9", "Résumé: naïve café, Page 12"):
+        assert PDFProcessor.clean_text(text) == legacy_clean_text(text)
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.resume_index import QuerySyntaxError
+from utils.results_store import ResultsStore
+
+CANDIDATES = {
+    "ada": (92, 60, 90, ["Python", "Kubernetes"], ["Machine Learning"]),
+    "bob": (75, 80, 50, ["Python"], ["Kubernetes"]),
+    "cy": (55, 40, 85, ["Java", "Machine Learning"], ["Python"]),
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results_store.sqlite3"))
+    for resume_id, (score, experience, education, matched, missing) in CANDIDATES.items():
+        store.add("job", "Backend Engineer", resume_id, f"{resume_id.title()}\nResume", {
+            "overall_match_score": score,
+            "section_scores": {"experience": experience, "education": education, "skills": score},
+            "matched_skills": matched,
+            "missing_skills": missing,
+        })
+    return store
+
+
+def matching(store, expression, **kwargs):
+    page, total = store.leaderboard("job", expression, **kwargs)
+    assert total == len(page)
+    return [row["resume_id"] for row in page]
+
+
+def test_comparisons_and_skill_conditions(store):
+    assert matching(store, "score >= 75") == ["ada", "bob"]
+    assert matching(store, "experience != 60", sort="experience", descending=False) == ["cy", "bob"]
+    assert matching(store, "has python") == ["ada", "bob"]
+    assert matching(store, 'missing "machine learning"') == ["ada"]
+    # Aliases resolve to their canonical skill
+    assert matching(store, "has k8s") == ["ada"]
+
+
+def test_and_binds_tighter_than_or_and_not_applies_to_the_next_condition(store):
+    assert matching(store, "score > 90 or score < 60 and has java") == ["ada", "cy"]
+    assert matching(store, "(score > 90 or score < 60) and has java") == ["cy"]
+    assert matching(store, "not has python education > 80") == ["cy"]
+    assert matching(store, "not (has python and score > 80)") == ["bob", "cy"]
+
+
+@pytest.mark.parametrize("expression", ["score >", "score > high", "salary > 5", "has", "(score > 5",
+                                        "score > 5)", "score ~ 5"])
+def test_malformed_filters_raise_query_syntax_errors(store, expression):
+    with pytest.raises(QuerySyntaxError):
+        store.leaderboard("job", expression)
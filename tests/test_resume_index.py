@@ -0,0 +1,54 @@
+import pytest
+
+from utils.resume_index import QuerySyntaxError, ResumeIndex
+
+
+def test_search_sees_resumes_added_by_another_process(tmp_path):
+    path = str(tmp_path / "resume_index.sqlite3")
+    app_index, worker_index = ResumeIndex(path), ResumeIndex(path)
+    app_index.add_document("jane", "Jane Doe Python developer", name="jane.pdf")
+    assert app_index.search("python") == {"jane"}
+
+    worker_index.add_document("john", "John Roe Python and Kubernetes", name="john.pdf")
+    app_index.add_document("ada", "Ada Lovelace Kubernetes operator", name="ada.pdf")
+
+    assert len(app_index) == 3
+    assert app_index.search("python") == {"jane", "john"}
+    assert app_index.search("kubernetes AND NOT python") == {"ada"}
+    assert app_index.name("john") == "john.pdf"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ResumeIndex(str(tmp_path / "resume_index.sqlite3"))
+    index.add_document("ada", "Ada Python Kubernetes. Senior project manager",
+                       {"skills": "python, kubernetes", "experience": "senior project manager"})
+    index.add_document("bob", "Bob Python developer. Manager of the project office",
+                       {"skills": "python", "experience": "manager of the project office"})
+    index.add_document("cy", "Cy Java Kubernetes developer", {"skills": "java, kubernetes"})
+    return index
+
+
+def test_and_binds_tighter_than_or_and_adjacent_terms_are_anded(index):
+    assert index.search("java OR python AND office") == {"bob", "cy"}
+    assert index.search("(java OR python) AND office") == {"bob"}
+    assert index.search("(java OR python) developer") == {"bob", "cy"}
+    assert index.search("python kubernetes") == {"ada"}
+
+
+def test_not_and_phrases(index):
+    assert index.search("NOT python") == {"cy"}
+    assert index.search('python AND NOT "project manager"') == {"bob"}
+    assert index.search('"manager of the project"') == {"bob"}
+    assert index.search('experience:"project manager"') == {"ada"}
+
+
+def test_field_terms_only_match_their_section(index):
+    assert index.search("skills:java") == {"cy"}
+    assert index.search("experience:python") == set()
+
+
+@pytest.mark.parametrize("query", ["(python", "python)", "python AND", "NOT", "salary:high", 'awards:"x"'])
+def test_malformed_queries_raise_query_syntax_errors(index, query):
+    with pytest.raises(QuerySyntaxError):
+        index.search(query)
@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+# Sections whose scores become their own columns
+SCORE_SECTIONS = ("experience", "education", "skills")
+
+# List fields flattened to a delimited string column plus a count column
+LIST_FIELDS = ("matched_skills", "missing_skills", "keyword_matches", "strengths", "weaknesses", "recommendations")
+LIST_SEPARATOR = "; "
+
+# Every export has exactly these columns, in this order
+EXPORT_COLUMNS = (
+    ["resume", "overall_match_score"]
+    + [f"{section}_score" for section in SCORE_SECTIONS]
+    + [column for field in LIST_FIELDS for column in (field, f"{field}_count")]
+    + ["summary", "near_duplicate_similarity", "error"]
+)
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Rows buffered before a write; bounds memory whatever the number of results
+DEFAULT_CHUNK_ROWS = 1000
+
+
+def flatten_result(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an analysis result to one flat row with the EXPORT_COLUMNS keys"""
+    section_scores = record.get("section_scores") or {}
+    row: Dict[str, Any] = {
+        "resume": record.get("resume", ""),
+        "overall_match_score": record.get("overall_match_score"),
+    }
+    for section in SCORE_SECTIONS:
+        row[f"{section}_score"] = section_scores.get(section)
+    for field in LIST_FIELDS:
+        items = record.get(field) or []
+        row[field] = LIST_SEPARATOR.join(str(item) for item in items)
+        row[f"{field}_count"] = len(items)
+    row["summary"] = record.get("summary", "")
+    row["near_duplicate_similarity"] = (record.get("near_duplicate") or {}).get("similarity")
+    row["error"] = record.get("error", "")
+    return row
+
+
+def export_format(path: str) -> str:
+    """The export format implied by a file extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot infer export format from {path}; use a .csv, .jsonl or .parquet file")
+    return extension
+
+
+class ResultExporter:
+    """Writes analysis results to CSV, JSON lines or Parquet as they arrive.
+
+    Rows are flattened with flatten_result and written in chunks of
+    chunk_rows, so memory use does not grow with the number of results and
+    no DataFrame of the whole batch is built. Parquet needs pyarrow; each
+    chunk becomes a row group.
+
+        with ResultExporter("results.parquet") as exporter:
+            for index, result in analyzer.analyze_batch(resumes, job_description):
+                exporter.write({"resume": names[index], **result})
+    """
+
+    def __init__(self, path: str, file_format: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.format = file_format or export_format(path)
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {self.format}")
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._file = None
+        self._csv = None
+        self._parquet = None
+
+        if self.format == "parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError("Parquet export needs pyarrow: pip install pyarrow") from None
+            self._pa = pa
+            self._schema = pa.schema([(column, self._arrow_type(pa, column)) for column in EXPORT_COLUMNS])
+            self._parquet = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+            if self.format == "csv":
+                self._csv = csv.DictWriter(self._file, fieldnames=EXPORT_COLUMNS)
+                self._csv.writeheader()
+
+    @staticmethod
+    def _arrow_type(pa: Any, column: str) -> Any:
+        if column.endswith("_count"):
+            return pa.int32()
+        if column.endswith("_score"):
+            return pa.int16()
+        if column == "near_duplicate_similarity":
+            return pa.float32()
+        return pa.string()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Add one result; it reaches the file once a chunk fills up or on close"""
+        self._buffer.append(flatten_result(record))
+        if len(self._buffer) >= self.chunk_rows:
+            self.flush()
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Write every record from an iterable, consuming it lazily; returns how many were written"""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def flush(self) -> None:
+        """Write the buffered rows"""
+        if not self._buffer:
+            return
+        if self._parquet is not None:
+            columns = {column: [row[column] for row in self._buffer] for column in EXPORT_COLUMNS}
+            self._parquet.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        elif self._csv is not None:
+            self._csv.writerows(self._buffer)
+            self._file.flush()
+        else:
+            self._file.writelines(json.dumps(row) + "\n" for row in self._buffer)
+            self._file.flush()
+        self.rows_written += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Write any remaining rows and close the file"""
+        try:
+            self.flush()
+        finally:
+            if self._parquet is not None:
+                self._parquet.close()
+                self._parquet = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -1,89 +1,616 @@
-import google.generativeai as genai
-import json
-from typing import Dict, Any
-import os
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import PurePath
 
-class GeminiAnalyzer:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    def analyze_resume_match(self, resume_text: str, job_description: str) -> Dict[str, Any]:
-        """Analyze how well resume matches job description"""
-        
-        prompt = f"""
-        You are an expert ATS (Applicant Tracking System) analyzer. Compare the following resume against the job description and provide a detailed analysis.
+from utils.gemini_client import GeminiClient, PRIORITY_BATCH, PRIORITY_INTERACTIVE, shared_limits
+from utils.job_profile import JobProfile
+from utils.json_parsing import IncrementalJSONParser, parse_json_object
+from utils.memory_cache import LRUCache
+from utils.metrics import Trace, record, trace
+from utils.model_backend import ModelBackend, create_backend
+from utils.near_duplicates import MinHash, NearDuplicateIndex
+from utils.pdf_processor import NO_TEXT, ExtractionResult, PDFProcessor
+from utils.prompt_builder import (ANALYSIS_SCHEMA, DEFAULT_TOKEN_BUDGET, SUGGESTION_SECTIONS, SUGGESTIONS_SCHEMA,
+                                  BuiltPrompt, PromptBuilder, estimate_tokens)
+from utils.result_cache import ResultCache
+from utils.resume_index import ResumeIndex
+from utils.results_store import ResultsStore
+from utils.skills import default_matcher
+from utils.tokenizer import tokenize
 
-        JOB DESCRIPTION:
-        {job_description}
+if TYPE_CHECKING:
+    from utils.job_catalog import JobCatalog
 
-        RESUME:
-        {resume_text}
+# Bump whenever a prompt changes so cached results from older prompts are not reused
+PROMPT_VERSION = 5
 
-        Please provide your analysis in the following JSON format:
-        {{
-            "overall_match_score": <number between 0-100>,
-            "matched_skills": [<list of skills from resume that match job requirements>],
-            "missing_skills": [<list of important skills from job description not found in resume>],
-            "strengths": [<list of candidate's key strengths for this role>],
-            "weaknesses": [<list of areas where candidate falls short>],
-            "recommendations": [<list of specific suggestions to improve resume for this role>],
-            "keyword_matches": [<list of important keywords that matched>],
-            "section_scores": {{
-                "experience": <score 0-100>,
-                "education": <score 0-100>,
-                "skills": <score 0-100>
-            }},
-            "summary": "<brief overall assessment>"
-        }}
+# Seconds a section's suggestions wait for a running prefetch before making their own call.
+# Prefetches run at batch priority and may be queued behind a batch, so a user is not kept waiting long.
+PREFETCH_WAIT = 5.0
 
-        Be specific and actionable in your analysis. Focus on relevant skills, experience level, and qualifications mentioned in the job description.
-        """
+logger = logging.getLogger(__name__)
 
+class GeminiAnalyzer:
+    def __init__(self, api_key: str, cache: Optional[ResultCache] = None,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, backend: Optional[ModelBackend] = None,
+                 near_duplicates: Optional[NearDuplicateIndex] = None,
+                 results_store: Optional[ResultsStore] = None, resume_index: Optional[ResumeIndex] = None):
+        # Gemini unless ATS_MODEL_BACKEND selects another; pass FakeBackend() to run offline
+        self.backend = backend or create_backend(api_key)
+        self.model_name = self.backend.model_name
+        # Rate limits and the circuit breaker are shared by every analyzer using this key
+        scheduler, breaker = shared_limits(api_key, self.backend.requests_per_minute,
+                                           self.backend.tokens_per_minute)
+        self.client = GeminiClient(self.backend, scheduler, breaker)
+        self.cache = cache
+        # Reuses analyses of near-identical resumes; needs the cache, which holds the results
+        self.near_duplicates = near_duplicates
+        # Every successful analysis is also recorded here for the candidate leaderboard
+        self.results_store = results_store
+        # Every extracted or analyzed resume is added here for boolean search
+        self.resume_index = resume_index
+        self.prompt_builder = PromptBuilder(token_budget)
+        # Suggestions key -> Future of generate_all_suggestions started by prefetch_suggestions
+        self._prefetched = LRUCache(max_entries=64)
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suggestions")
+    
+    def _cache_key(self, kind: str, *parts: str) -> str:
+        """Content hash identifying a model request"""
+        return ResultCache.make_key(kind, PROMPT_VERSION, self.model_name,
+                                    self.prompt_builder.token_budget, *parts)
+    
+    def analyze_resume_match(self, resume_text: str, job_description: Union[str, JobProfile],
+                             priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """Analyze how well resume matches job description
+        
+        job_description may be the text or its JobProfile; batches pass the
+        profile so the job description is parsed once for all resumes.
+        """
+        
+        with trace("analysis") as active:
+            profile = self.prompt_builder.job_profile(job_description)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self._cache_key("analysis", resume_text, profile.text)
+                cached = self.cache.get(cache_key)
+                active.cache["analysis"] = cached is not None
+                if cached is not None:
+                    self._persist(resume_text, profile, cached)
+                    return cached
+            
+            with active.stage("skill_match"):
+                local = self._skill_report(resume_text, profile)
+            signature, reused = self._find_near_duplicate(resume_text, profile, local, cache_key, active)
+            if reused is not None:
+                self.cache.set(cache_key, reused)
+                self._persist(resume_text, profile, reused)
+                return reused
+            with active.stage("prompt_build"):
+                prompt = self.prompt_builder.build_analysis_prompt(resume_text, profile, local["matched_skills"],
+                                                                   local["missing_skills"])
+            logger.debug("analysis prompt: %d input tokens (%d before compression)",
+                         prompt.input_tokens, prompt.original_tokens)
+            
+            try:
+                with active.stage("model"):
+                    response = self.client.generate_content(prompt.text, priority=priority, json_output=True,
+                                                            response_schema=ANALYSIS_SCHEMA)
+                    text = response.text
+                self._record_tokens(active, prompt, response, text)
+                with active.stage("json_parse"):
+                    result = self._parse_analysis(text)
+                result.update(local)
+            
+            except Exception as e:
+                # Return default structure if API fails
+                active.error = str(e)
+                return self._default_analysis(f"Analysis failed: {str(e)}")
+            
+            # Only successful analyses are cached so failures are retried next time
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+                if signature is not None:
+                    self.near_duplicates.add(self._near_duplicate_job(profile), signature, cache_key)
+            self._persist(resume_text, profile, result)
+            return result
+    
+    def stream_resume_match(self, resume_text: str,
+                            job_description: Union[str, JobProfile]) -> Iterator[Dict[str, Any]]:
+        """Stream the match analysis as the model generates it
+        
+        Each yielded dict holds every top-level field completed so far. The
+        locally matched skill and keyword lists come first, then the score and
+        summary arrive before the long lists finish. The last dict yielded is
+        the complete result, exactly as analyze_resume_match returns it.
+        """
+        # Recorded explicitly: a generator must not hold the ambient trace across yields
+        active = Trace("analysis")
+        try:
+            profile = self.prompt_builder.job_profile(job_description)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self._cache_key("analysis", resume_text, profile.text)
+                cached = self.cache.get(cache_key)
+                active.cache["analysis"] = cached is not None
+                if cached is not None:
+                    self._persist(resume_text, profile, cached)
+                    yield cached
+                    return
+            
+            with active.stage("skill_match"):
+                local = self._skill_report(resume_text, profile)
+            signature, reused = self._find_near_duplicate(resume_text, profile, local, cache_key, active)
+            if reused is not None:
+                self.cache.set(cache_key, reused)
+                self._persist(resume_text, profile, reused)
+                yield reused
+                return
+            yield dict(local)
+            with active.stage("prompt_build"):
+                prompt = self.prompt_builder.build_analysis_prompt(resume_text, profile, local["matched_skills"],
+                                                                   local["missing_skills"])
+            logger.debug("analysis prompt: %d input tokens (%d before compression)",
+                         prompt.input_tokens, prompt.original_tokens)
+            
+            parser = IncrementalJSONParser()
+            chunk = None
+            try:
+                # Model time includes the consumer's handling of each partial result
+                with active.stage("model"):
+                    # No response_schema here: the schema would reorder the fields and
+                    # delay the score, which the prompt asks for first
+                    for chunk in self.client.generate_content(prompt.text, stream=True, json_output=True):
+                        if parser.feed(self._chunk_text(chunk)):
+                            yield {**parser.fields, **local}
+                self._record_tokens(active, prompt, chunk, parser.buffer)
+                with active.stage("json_parse"):
+                    result = self._parse_analysis(parser.buffer)
+                result.update(local)
+            except Exception as e:
+                active.error = str(e)
+                yield self._default_analysis(f"Analysis failed: {str(e)}")
+                return
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+                if signature is not None:
+                    self.near_duplicates.add(self._near_duplicate_job(profile), signature, cache_key)
+            self._persist(resume_text, profile, result)
+            yield result
+        finally:
+            record(active)
+    
+    def _persist(self, resume_text: str, profile: JobProfile, result: Dict[str, Any]) -> None:
+        """Record a successful result in the results store and its resume in the search index, if set"""
+        self._index(resume_text)
+        if self.results_store is None:
+            return
+        # Same id as the resume search index, so names can be looked up there
+        resume_id = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+        try:
+            self.results_store.add(profile.digest, profile.text, resume_id, resume_text, result)
+        except sqlite3.Error as e:
+            logger.warning("Could not store analysis result: %s", e)
+    
+    def _index(self, resume_text: str, name: Optional[str] = None) -> None:
+        """Add a resume to the search index, if there is one"""
+        if self.resume_index is None:
+            return
         try:
-            response = self.model.generate_content(prompt)
-            # Clean the response to extract JSON
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```'):
-                response_text = response_text[7:-3]  # Remove ```json and ```
-            elif response_text.startswith('```'):
-                response_text = response_text[3:-3]  # Remove ``````
-            
-            return json.loads(response_text)
-        
-        except Exception as e:
-            # Return default structure if API fails
-            return {
-                "overall_match_score": 0,
-                "matched_skills": [],
-                "missing_skills": [],
-                "strengths": [],
-                "weaknesses": ["Unable to analyze due to API error"],
-                "recommendations": ["Please try again"],
-                "keyword_matches": [],
-                "section_scores": {"experience": 0, "education": 0, "skills": 0},
-                "summary": f"Analysis failed: {str(e)}"
+            self.resume_index.add_resume(resume_text, name)
+        except sqlite3.Error as e:
+            logger.warning("Could not index resume: %s", e)
+    
+    def _near_duplicate_job(self, profile: JobProfile) -> str:
+        """Groups near-duplicate lookups by job description, prompt version and model"""
+        return self._cache_key("near_duplicate", profile.text)
+    
+    def _find_near_duplicate(self, resume_text: str, profile: JobProfile, local: Dict[str, List[str]],
+                             cache_key: Optional[str], active: Trace) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """The resume's MinHash signature and any reusable near-duplicate result, or (None, None) when disabled"""
+        if self.near_duplicates is None or cache_key is None:
+            return None, None
+        with active.stage("near_duplicate"):
+            signature = MinHash.signature(resume_text)
+            reused = self._reuse_near_duplicate(profile, signature, local)
+        active.cache["near_duplicate"] = reused is not None
+        return signature, reused
+    
+    def _reuse_near_duplicate(self, profile: JobProfile, signature: Any,
+                              local: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        """The stored analysis of a near-identical resume for the same job, or None
+        
+        A candidate is only reused when the same job skills were found in both
+        resumes, so an edit that adds or removes a skill is analyzed afresh.
+        The reused result carries this resume's skill and keyword lists and
+        the estimated similarity under "near_duplicate".
+        """
+        for result_key, similarity in self.near_duplicates.query(self._near_duplicate_job(profile), signature):
+            stored = self.cache.get(result_key)
+            if stored is None:
+                # The result was evicted from the cache; forget the signature too
+                self.near_duplicates.remove(result_key)
+                continue
+            if stored.get("matched_skills") != local["matched_skills"]:
+                continue
+            logger.debug("reusing analysis of a near-duplicate resume (similarity %.2f)", similarity)
+            return {**stored, **local, "near_duplicate": {"similarity": round(similarity, 3)}}
+        return None
+    
+    @staticmethod
+    def _skill_report(resume_text: str, profile: JobProfile) -> Dict[str, List[str]]:
+        """Skill and keyword lists computed locally and deterministically, without the model"""
+        matched, missing = default_matcher().compare(resume_text, profile.skills)
+        resume_terms = set(tokenize(resume_text))
+        return {
+            "matched_skills": matched,
+            "missing_skills": missing,
+            "keyword_matches": [keyword for keyword in profile.keywords if keyword in resume_terms]
+        }
+    
+    @classmethod
+    def _parse_analysis(cls, response_text: str) -> Dict[str, Any]:
+        """Extract the JSON analysis from a model response
+        
+        The object is located and repaired if needed (code fences, surrounding
+        prose, trailing commas, truncation), and fields that are missing or
+        have the wrong type are filled with neutral defaults.
+        """
+        parsed = parse_json_object(response_text)
+        
+        result = cls._default_analysis("")
+        del result["error"]
+        for field, default in result.items():
+            value = parsed.get(field)
+            if isinstance(default, list):
+                result[field] = [str(item) for item in value] if isinstance(value, list) else []
+            elif field == "section_scores":
+                value = value if isinstance(value, dict) else {}
+                result[field] = {section: cls._score(value.get(section)) for section in default}
+            elif field == "overall_match_score":
+                result[field] = cls._score(value)
+            elif isinstance(value, str):
+                result[field] = value
+        return result
+    
+    @staticmethod
+    def _score(value: Any) -> int:
+        """Coerce a model score to an int from 0 to 100"""
+        try:
+            return max(0, min(100, int(round(float(value)))))
+        except (TypeError, ValueError):
+            return 0
+    
+    @staticmethod
+    def _record_tokens(active: Trace, prompt: BuiltPrompt, response: Any, response_text: str) -> None:
+        """Add token counts to a trace, preferring the API's usage metadata over estimates"""
+        usage = getattr(response, "usage_metadata", None)
+        active.add_tokens("prompt", getattr(usage, "prompt_token_count", 0) or prompt.input_tokens)
+        active.add_tokens("response", getattr(usage, "candidates_token_count", 0) or estimate_tokens(response_text))
+        cached = getattr(usage, "cached_content_token_count", 0)
+        if cached:
+            active.add_tokens("cached", cached)
+    
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """Text of a streamed response chunk; chunks without text parts yield ''"""
+        try:
+            return chunk.text
+        except ValueError:
+            return ""
+    
+    def analyze_batch(self, resumes: Iterable[Any], job_description: str,
+                      max_workers: int = 8, top_k: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Analyze many resumes against one job description concurrently.
+        
+        Each resume may be extracted text (str), raw PDF bytes, a PDF path (str
+        ending in .pdf or naming an existing file, or a Path) or a file-like
+        PDF object. Yields (index, result) pairs as each analysis
+        finishes, so results arrive in completion order rather than input order.
+        At most max_workers model calls are in flight at any time.
+        
+        When top_k is given, every resume is first extracted on the same
+        worker threads and scored locally with BM25, and only the top_k best
+        candidates are sent to the model; the others are not yielded.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        
+        # Parse the job description once for every resume in the batch
+        profile = self.prompt_builder.job_profile(job_description)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            if top_k is not None:
+                from utils.prerank import BM25Ranker
+                # Every resume must be read before ranking, so extract them all concurrently
+                extractions = list(executor.map(self.extract_resume, resumes))
+                shortlist = BM25Ranker().top_k([extraction.text for extraction in extractions], job_description, top_k)
+                resumes = iter((index, extractions[index]) for index, _ in shortlist)
+            else:
+                resumes = iter(enumerate(resumes))
+            pending = {}
+            
+            def submit_next() -> bool:
+                for index, resume in resumes:
+                    future = executor.submit(self._analyze_one, resume, profile)
+                    pending[future] = index
+                    return True
+                return False
+            
+            # Keep a bounded window of work queued so large inputs stay lazy
+            for _ in range(max_workers * 2):
+                if not submit_next():
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    submit_next()
+                    yield index, future.result()
+    
+    def match_jobs(self, resume: Any, catalog: "JobCatalog", top_k: int = 3,
+                   max_workers: int = 3) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+        """Find the jobs in a catalog that best fit one resume and analyze only those.
+        
+        The resume may be text or any PDF input accepted by analyze_batch.
+        Every job is scored locally with catalog.top_jobs and only the top_k
+        best-fitting jobs are sent to the model. Yields (job index, local
+        score, result) as each analysis finishes.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        extraction = self.extract_resume(resume)
+        if not extraction.ok:
+            raise ValueError(f"Unable to extract text from resume: {extraction.message}")
+        
+        shortlist = catalog.top_jobs(extraction.text, top_k)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.analyze_resume_match, extraction.text, catalog.job_descriptions[index]):
+                    (index, score)
+                for index, score in shortlist
             }
+            for future in as_completed(futures):
+                index, score = futures[future]
+                yield index, score, future.result()
+    
+    def _analyze_one(self, resume: Any, job_description: Union[str, JobProfile]) -> Dict[str, Any]:
+        """Extract a single batch entry if needed and analyze it"""
+        # One trace covers both extraction and analysis of the entry
+        with trace("analysis") as active:
+            extraction = self.extract_resume(resume)
+            if not extraction.ok:
+                active.error = f"unable to extract text from resume: {extraction.failure}"
+                return self._default_analysis(
+                    f"Analysis failed: unable to extract text from resume. {extraction.message}"
+                )
+            return self.analyze_resume_match(extraction.text, job_description, priority=PRIORITY_BATCH)
+    
+    def extract_resume(self, resume: Any) -> ExtractionResult:
+        """Extract a resume as analyze_batch does and add it to the search index under its file name"""
+        extraction = self._extract_resume(resume)
+        # Already-extracted entries were indexed when they were extracted
+        if extraction.ok and extraction is not resume:
+            # Paths, Path objects, open files and uploads are named after their file
+            name = resume if isinstance(resume, str) and extraction.text != resume else getattr(resume, "name", None)
+            self._index(extraction.text, PurePath(name).name if isinstance(name, str) else None)
+            if extraction.truncated:
+                logger.warning("Only the first pages of %s were read before the time budget ran out",
+                               name or "a resume")
+        return extraction
+    
+    @staticmethod
+    def _extract_resume(resume: Any) -> ExtractionResult:
+        """Return the text of a batch entry, extracting it if it is a PDF"""
+        if isinstance(resume, ExtractionResult):
+            # Already extracted while pre-ranking
+            return resume
+        if isinstance(resume, str) and not PDFProcessor.is_pdf_path(resume):
+            return ExtractionResult(resume) if resume else ExtractionResult(None, NO_TEXT)
+        return PDFProcessor.extract(resume)
+    
+    @staticmethod
+    def _default_analysis(summary: str) -> Dict[str, Any]:
+        """Default result structure used when an analysis cannot be produced"""
+        return {
+            "overall_match_score": 0,
+            "matched_skills": [],
+            "missing_skills": [],
+            "strengths": [],
+            "weaknesses": ["Unable to analyze due to API error"],
+            "recommendations": ["Please try again"],
+            "keyword_matches": [],
+            "section_scores": {"experience": 0, "education": 0, "skills": 0},
+            "summary": summary,
+            # Marks this as a failed analysis rather than a genuine score of 0
+            "error": summary
+        }
     
     def generate_resume_suggestions(self, resume_text: str, job_description: str, section: str) -> str:
         """Generate specific suggestions for improving a resume section"""
         
-        prompt = f"""
-        Based on this job description and resume, provide 3-5 specific, actionable suggestions for improving the {section} section of the resume.
-
-        JOB DESCRIPTION:
-        {job_description}
-
-        CURRENT RESUME:
-        {resume_text}
-
-        Focus on the {section} section and provide suggestions that would help the candidate better align with the job requirements. Be specific and practical.
+        with trace("suggestions") as active:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self._cache_key("suggestions", resume_text, job_description, section)
+                cached = self.cache.get(cache_key)
+                active.cache["suggestions"] = cached is not None
+                if cached is not None:
+                    return cached
+            
+            prefetched = self.prefetched_suggestions(resume_text, job_description, section, wait=PREFETCH_WAIT)
+            active.cache["prefetch"] = prefetched is not None
+            if prefetched is not None:
+                return prefetched
+            
+            with active.stage("prompt_build"):
+                prompt = self.prompt_builder.build_suggestions_prompt(resume_text, job_description, section)
+            logger.debug("%s suggestions prompt: %d input tokens (%d before compression)",
+                         section, prompt.input_tokens, prompt.original_tokens)
+            
+            try:
+                with active.stage("model"):
+                    response = self.client.generate_content(prompt.text)
+                    suggestions = response.text.strip()
+                self._record_tokens(active, prompt, response, suggestions)
+            except Exception as e:
+                active.error = str(e)
+                return f"Unable to generate suggestions: {str(e)}"
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, suggestions)
+            return suggestions
+    
+    def generate_all_suggestions(self, resume_text: str, job_description: str,
+                                 priority: int = PRIORITY_INTERACTIVE) -> Dict[str, str]:
+        """Suggestions for every section in SUGGESTION_SECTIONS from one structured model call
+        
+        The resume and job description are sent once instead of once per
+        section. Each section's suggestions are also cached under the key
+        generate_resume_suggestions uses. Returns an empty dict if the call
+        fails, so sections fall back to their own calls.
         """
         
+        with trace("suggestions") as active:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self._cache_key("all_suggestions", resume_text, job_description)
+                cached = self.cache.get(cache_key)
+                active.cache["suggestions"] = cached is not None
+                if cached is not None:
+                    return cached
+            
+            with active.stage("prompt_build"):
+                prompt = self.prompt_builder.build_all_suggestions_prompt(resume_text, job_description)
+            logger.debug("all suggestions prompt: %d input tokens (%d before compression)",
+                         prompt.input_tokens, prompt.original_tokens)
+            
+            try:
+                with active.stage("model"):
+                    response = self.client.generate_content(prompt.text, priority=priority, json_output=True,
+                                                            response_schema=SUGGESTIONS_SCHEMA)
+                    text = response.text
+                self._record_tokens(active, prompt, response, text)
+                with active.stage("json_parse"):
+                    suggestions = self._parse_suggestions(text)
+            except Exception as e:
+                active.error = str(e)
+                logger.warning("Could not generate suggestions for every section (%s)", e)
+                return {}
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, suggestions)
+                for section, section_suggestions in suggestions.items():
+                    self.cache.set(self._cache_key("suggestions", resume_text, job_description, section),
+                                   section_suggestions)
+            return suggestions
+    
+    @staticmethod
+    def _parse_suggestions(response_text: str) -> Dict[str, str]:
+        """Each section's suggestions from a JSON response, as a numbered list"""
+        parsed = parse_json_object(response_text)
+        suggestions = {}
+        for section in SUGGESTION_SECTIONS:
+            items = parsed.get(section)
+            if isinstance(items, list) and items:
+                suggestions[section] = "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+        if not suggestions:
+            raise ValueError("response contained no section suggestions")
+        return suggestions
+    
+    def prefetch_suggestions(self, resume_text: str, job_description: str, retry: bool = False) -> Future:
+        """Start generate_all_suggestions in a background thread
+        
+        Call it when an analysis finishes. Later per-section requests for the
+        same resume and job description then use its result instead of making
+        their own calls. Repeated calls share one future. A failed prefetch is
+        remembered and only started again when retry is set, so reruns of a
+        page do not repeat a failing call.
+        """
+        key = self._cache_key("all_suggestions", resume_text, job_description)
+        with self._prefetch_lock:
+            future = self._prefetched.get(key)
+            if future is None or (retry and self._prefetch_failed(future)):
+                # Batch priority: a speculative call never delays one a user is waiting on
+                future = self._prefetch_executor.submit(self.generate_all_suggestions, resume_text,
+                                                        job_description, PRIORITY_BATCH)
+                self._prefetched.set(key, future)
+            return future
+    
+    def prefetch_pending(self, resume_text: str, job_description: str) -> bool:
+        """Whether a prefetch for this resume and job description is still running"""
+        future = self._prefetched.get(self._cache_key("all_suggestions", resume_text, job_description))
+        return future is not None and not future.done()
+    
+    def prefetch_failed(self, resume_text: str, job_description: str) -> bool:
+        """Whether the prefetch for this resume and job description finished without suggestions"""
+        future = self._prefetched.get(self._cache_key("all_suggestions", resume_text, job_description))
+        return future is not None and self._prefetch_failed(future)
+    
+    @staticmethod
+    def _prefetch_failed(future: Future) -> bool:
+        return future.done() and (future.exception() is not None or not future.result())
+    
+    def prefetched_suggestions(self, resume_text: str, job_description: str, section: str,
+                               wait: float = 0.0) -> Optional[str]:
+        """A section's suggestions from a prefetch, waiting up to wait seconds for one still running
+        
+        Returns None if nothing was prefetched, the prefetch failed or it is still running.
+        """
+        future = self._prefetched.get(self._cache_key("all_suggestions", resume_text, job_description))
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=wait).get(section)
+        except Exception:
+            return None
+    
+    def stream_resume_suggestions(self, resume_text: str, job_description: str, section: str) -> Iterator[str]:
+        """Stream suggestions for a resume section, yielding text as it arrives"""
+        
+        active = Trace("suggestions")
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"Unable to generate suggestions: {str(e)}"
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self._cache_key("suggestions", resume_text, job_description, section)
+                cached = self.cache.get(cache_key)
+                active.cache["suggestions"] = cached is not None
+                if cached is not None:
+                    yield cached
+                    return
+            
+            prefetched = self.prefetched_suggestions(resume_text, job_description, section, wait=PREFETCH_WAIT)
+            active.cache["prefetch"] = prefetched is not None
+            if prefetched is not None:
+                yield prefetched
+                return
+            
+            with active.stage("prompt_build"):
+                prompt = self.prompt_builder.build_suggestions_prompt(resume_text, job_description, section)
+            logger.debug("%s suggestions prompt: %d input tokens (%d before compression)",
+                         section, prompt.input_tokens, prompt.original_tokens)
+            
+            parts = []
+            chunk = None
+            try:
+                with active.stage("model"):
+                    for chunk in self.client.generate_content(prompt.text, stream=True):
+                        text = self._chunk_text(chunk)
+                        if text:
+                            parts.append(text)
+                            yield text
+                self._record_tokens(active, prompt, chunk, "".join(parts))
+            except Exception as e:
+                active.error = str(e)
+                yield f"Unable to generate suggestions: {str(e)}"
+                return
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, "".join(parts).strip())
+        finally:
+            record(active)
@@ -0,0 +1,324 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.prompt_builder import estimate_tokens
+from utils.result_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Free-tier gemini-1.5-flash quotas; raise them for paid projects
+DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get("ATS_GEMINI_RPM", "15"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.environ.get("ATS_GEMINI_TPM", "1000000"))
+
+# Output tokens reserved per request on top of the prompt estimate
+EXPECTED_OUTPUT_TOKENS = 1024
+
+# HTTP status codes worth retrying: rate limited, server error, unavailable, timeout
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker is rejecting calls"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity tokens per period seconds"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount tokens are available"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class SharedQuota:
+    """Requests-per-minute and tokens-per-minute buckets kept in SQLite.
+
+    Every process using the same database and name draws from one quota, so
+    the app and its queue workers together stay within the API's limits
+    instead of each getting the full allowance. Levels are refilled from
+    wall-clock time whenever a request is admitted.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int,
+                 path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "rate_limits.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.name = name
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quotas (
+                name TEXT PRIMARY KEY,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    def try_acquire(self, tokens: float) -> float:
+        """Take one request and tokens if both are available and return 0, else the seconds to wait"""
+        tokens = min(tokens, self.tokens_per_minute)
+        request_rate = self.requests_per_minute / 60.0
+        token_rate = self.tokens_per_minute / 60.0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT requests, tokens, updated FROM quotas WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    requests, available = self.requests_per_minute, self.tokens_per_minute
+                else:
+                    elapsed = max(0.0, now - row[2])
+                    requests = min(self.requests_per_minute, row[0] + elapsed * request_rate)
+                    available = min(self.tokens_per_minute, row[1] + elapsed * token_rate)
+                delay = max(0.0, (1.0 - requests) / request_rate, (tokens - available) / token_rate)
+                if delay <= 0:
+                    requests -= 1.0
+                    available -= tokens
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO quotas (name, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                    (self.name, requests, available, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return delay
+
+
+class RequestScheduler:
+    """Admits requests within requests-per-minute and tokens-per-minute quotas.
+
+    Waiting callers form a priority queue: the lowest priority value is
+    admitted first and equal priorities are served in arrival order, so
+    interactive requests overtake queued batch work. With a SharedQuota the
+    quotas are shared with other processes; priorities still order the
+    callers within this process.
+    """
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE, quota: Optional[SharedQuota] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.quota = quota
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Block until this request may be sent"""
+        ticket = (priority, next(self._counter))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        delay = self._try_consume(tokens)
+                        if delay <= 0:
+                            return
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def _try_consume(self, tokens: int) -> float:
+        """Consume quota for one request and return 0, or return the seconds until it is available"""
+        if self.quota is not None:
+            try:
+                return self.quota.try_acquire(tokens)
+            except sqlite3.Error as e:
+                logger.warning("Shared rate limit unavailable (%s); limiting this process only", e)
+                self.quota = None
+        now = time.monotonic()
+        delay = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+        if delay <= 0:
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+        return delay
+
+    def queue_length(self) -> int:
+        with self._condition:
+            return len(self._waiting)
+
+
+class CircuitBreaker:
+    """Stops calling the API after repeated failures and probes again after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may proceed"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                raise CircuitOpenError("Gemini API circuit is open after repeated failures; try again shortly")
+            # Half-open: let a single probe request through
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Let another call probe after a probe ended without an answer from the API"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an API error is transient and worth retrying"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # google.api_core exceptions expose the HTTP status as .code
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+_shared: Dict[str, Tuple[RequestScheduler, CircuitBreaker]] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_limits(api_key: str, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                  tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE) -> Tuple[RequestScheduler, CircuitBreaker]:
+    """Scheduler and breaker shared by every client using the same API key and quotas
+    
+    The quotas are also shared with other processes, such as queue workers,
+    through a SharedQuota in the cache directory.
+    """
+    key = hashlib.sha256(f"{api_key}:{requests_per_minute}:{tokens_per_minute}".encode("utf-8")).hexdigest()
+    with _shared_lock:
+        if key not in _shared:
+            try:
+                quota = SharedQuota(key, requests_per_minute, tokens_per_minute)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Shared rate limit unavailable (%s); limiting this process only", e)
+                quota = None
+            _shared[key] = (RequestScheduler(requests_per_minute, tokens_per_minute, quota), CircuitBreaker())
+        return _shared[key]
+
+
+class GeminiClient:
+    """Wraps a model's generate_content with rate limiting, retries and a circuit breaker.
+
+    Transient failures (429 and 5xx responses, connection errors) are retried
+    with jittered exponential backoff. Other errors, and the last transient
+    error once retries are exhausted, are raised to the caller.
+    """
+
+    def __init__(self, model: Any, scheduler: Optional[RequestScheduler] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_retries: int = 4,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.model = model
+        self.scheduler = scheduler or RequestScheduler()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def generate_content(self, prompt: str, priority: int = PRIORITY_INTERACTIVE,
+                         stream: bool = False, **kwargs: Any) -> Any:
+        """Call the model, returning its response or a chunk iterator when streaming"""
+        tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                self.scheduler.acquire(tokens, priority)
+                if stream:
+                    response = self._start_stream(prompt, **kwargs)
+                else:
+                    response = self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Only this request was bad, which says nothing about the API's health:
+                    # leave the failure count alone and let the next call probe instead
+                    self.breaker.release_probe()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                logger.warning("Gemini call failed (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Interrupted before the API answered; never leave the half-open probe taken
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return response
+
+    def _start_stream(self, prompt: str, **kwargs: Any) -> Iterator[Any]:
+        """Start a streamed call, fetching the first chunk so connection errors can be retried"""
+        chunks = iter(self.model.generate_content(prompt, stream=True, **kwargs))
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return iter(())
+        return itertools.chain((first,), chunks)
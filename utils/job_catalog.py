@@ -0,0 +1,128 @@
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.job_profile import JobProfile
+from utils.memory_cache import LRUCache
+from utils.prerank import top_k_indices
+from utils.skills import default_matcher
+from utils.tokenizer import tokenize
+
+# Share of the local match score given to skill coverage; the rest is text similarity
+SKILL_WEIGHT = 0.6
+
+# Term counts and skills of each job description, keyed by its digest, so a
+# catalog that gains one job only vectorizes the new one
+_job_vectors = LRUCache(max_entries=4096)
+_catalogs = LRUCache(max_entries=16)
+
+
+class JobCatalog:
+    """Many job descriptions vectorized once for scoring resumes against all of them.
+
+    Each job becomes a row of an L2-normalized TF-IDF matrix over the
+    catalog's vocabulary and a row of a binary matrix over the dictionary
+    skills it mentions. Scoring a resume is then two matrix products, so a
+    catalog of hundreds of jobs is ranked in milliseconds. The local score
+    mixes the share of a job's skills the resume has with the cosine
+    similarity of their text, on a 0-100 scale. It is meant for choosing
+    which jobs to analyze with the model, not as a substitute for it.
+    """
+
+    def __init__(self, job_descriptions: Sequence[str], names: Optional[Sequence[str]] = None):
+        if names is not None and len(names) != len(job_descriptions):
+            raise ValueError("names must have one entry per job description")
+        self.job_descriptions = list(job_descriptions)
+        self.names = list(names) if names is not None else [self._headline(text) for text in self.job_descriptions]
+
+        vectors = [self._vectorize(text) for text in self.job_descriptions]
+        self.vocabulary = self._index(term for counts, _ in vectors for term in counts)
+        self.skills = self._index(skill for _, skills in vectors for skill in skills)
+
+        tf = np.zeros((len(vectors), len(self.vocabulary)), dtype=np.float32)
+        skill_matrix = np.zeros((len(vectors), len(self.skills)), dtype=np.float32)
+        for row, (counts, skills) in enumerate(vectors):
+            tf[row, [self.vocabulary[term] for term in counts]] = list(counts.values())
+            skill_matrix[row, [self.skills[skill] for skill in skills]] = 1.0
+
+        # Smoothed IDF, so a term in every job still counts a little
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1.0 + len(vectors)) / (1.0 + df)) + 1.0).astype(np.float32)
+        self.term_matrix = self._normalize(self._weight(tf) * self.idf)
+        self.skill_matrix = skill_matrix
+        self.skill_counts = skill_matrix.sum(axis=1)
+
+    @classmethod
+    def build(cls, job_descriptions: Sequence[str], names: Optional[Sequence[str]] = None) -> "JobCatalog":
+        """Return the cached catalog for these job descriptions, building it on first use"""
+        digest = hashlib.sha256()
+        for text in job_descriptions:
+            digest.update(JobProfile.digest_of(text).encode("ascii"))
+        for name in names or ():
+            digest.update(b"\0" + name.encode("utf-8"))
+        key = digest.hexdigest()
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = cls(job_descriptions, names)
+            _catalogs.set(key, catalog)
+        return catalog
+
+    @staticmethod
+    def _headline(text: str, length: int = 80) -> str:
+        """The first non-empty line of a job description, usually its title"""
+        for line in text.splitlines():
+            if line.strip():
+                return line.strip()[:length]
+        return ""
+
+    @staticmethod
+    def _vectorize(text: str) -> Tuple[Counter, Tuple[str, ...]]:
+        key = JobProfile.digest_of(text)
+        vector = _job_vectors.get(key)
+        if vector is None:
+            vector = (Counter(tokenize(text)), tuple(default_matcher().extract(text)))
+            _job_vectors.set(key, vector)
+        return vector
+
+    @staticmethod
+    def _index(items) -> Dict[str, int]:
+        index: Dict[str, int] = {}
+        for item in items:
+            index.setdefault(item, len(index))
+        return index
+
+    @staticmethod
+    def _weight(tf: np.ndarray) -> np.ndarray:
+        """Sublinear term frequency, so a term repeated ten times does not count ten times"""
+        return np.log1p(tf, where=tf > 0, out=np.zeros_like(tf))
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def __len__(self) -> int:
+        return len(self.job_descriptions)
+
+    def score_matrix(self, resumes: Sequence[str]) -> np.ndarray:
+        """Local match score of every resume against every job, as a (resumes x jobs) array"""
+        tf = np.zeros((len(resumes), len(self.vocabulary)), dtype=np.float32)
+        found = np.zeros((len(resumes), len(self.skills)), dtype=np.float32)
+        for row, text in enumerate(resumes):
+            counts = Counter(term for term in tokenize(text or "") if term in self.vocabulary)
+            tf[row, [self.vocabulary[term] for term in counts]] = list(counts.values())
+            skills = [self.skills[skill] for skill in default_matcher().extract(text or "") if skill in self.skills]
+            found[row, skills] = 1.0
+
+        similarity = self._normalize(self._weight(tf) * self.idf) @ self.term_matrix.T
+        coverage = (found @ self.skill_matrix.T) / np.maximum(self.skill_counts, 1.0)
+        # Jobs that name no dictionary skills are scored on text alone
+        scores = np.where(self.skill_counts > 0, SKILL_WEIGHT * coverage + (1.0 - SKILL_WEIGHT) * similarity,
+                          similarity)
+        return np.round(scores.astype(np.float64) * 100.0, 1)
+
+    def top_jobs(self, resume_text: str, k: int) -> List[Tuple[int, float]]:
+        """Return (job index, local score) for the k best-fitting jobs, highest score first"""
+        return top_k_indices(self.score_matrix([resume_text])[0], k)
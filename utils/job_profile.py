@@ -0,0 +1,148 @@
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, Match, Tuple
+
+from utils.memory_cache import LRUCache
+from utils.skills import default_matcher
+from utils.tokenizer import tokenize
+
+if TYPE_CHECKING:
+    from utils.prompt_builder import PromptBuilder
+
+# Job description headings, mapped to the section they start
+JOB_SECTION_HEADERS = {
+    'about': ('about the role', 'about the job', 'about us', 'who we are'),
+    'responsibilities': ('responsibilities', 'key responsibilities', 'what you will do',
+                         "what you'll do", 'the role', 'duties'),
+    'requirements': ('requirements', 'qualifications', 'minimum qualifications', 'required skills',
+                     'what you will need', "what you'll need", 'what we are looking for', 'must have'),
+    'preferred': ('preferred qualifications', 'nice to have', 'nice-to-have', 'bonus points', 'preferred'),
+    'benefits': ('benefits', 'perks', 'what we offer'),
+}
+# Sections describing the employer rather than the role, left out of analysis prompts
+UNSCORED_SECTIONS = ('about', 'benefits')
+_JOB_HEADER_SECTIONS = {phrase: section for section, phrases in JOB_SECTION_HEADERS.items() for phrase in phrases}
+# A heading is a header phrase followed by a colon or alone on its line
+_JOB_HEADER_PATTERN = re.compile(
+    r'(?im)(?:^|(?<=[.!?•]))[ \t]*(' + '|'.join(sorted(map(re.escape, _JOB_HEADER_SECTIONS), key=len, reverse=True))
+    + r')[ \t]*(?::|$)'
+)
+
+# Cue words marking the sentences of a job description that state requirements
+REQUIREMENT_TERMS = frozenset(
+    "required requirements requirement must experience years proficient proficiency "
+    "knowledge familiarity degree qualifications skills ability responsible".split()
+)
+
+# Words common to every job posting that are never useful keyword matches
+_GENERIC_TERMS = frozenset(
+    "role team teams work working company candidate candidates job position opportunity join "
+    "looking including new well across help within day environment".split()
+)
+
+MAX_KEYWORDS = 25
+
+_profiles = LRUCache(max_entries=128)
+
+
+@dataclass(frozen=True)
+class JobProfile:
+    """A job description parsed once and reused for every resume scored against it.
+
+    Holds the deduplicated sentences, the compressed text sent in analysis
+    prompts, the sections found under common headings, requirement
+    sentences, the dictionary skills it mentions and the most frequent
+    keywords. The analysis text leaves out the about and benefits sections,
+    and suggestion prompts draw on the requirement sentences. Profiles are
+    cached by content hash and token budget, so building one for a job
+    description that was already seen is a dictionary lookup.
+    """
+    digest: str
+    text: str
+    sentences: Tuple[str, ...]
+    prompt_text: str
+    prompt_terms: FrozenSet[str]
+    requirements: Tuple[str, ...]
+    skills: Tuple[str, ...]
+    keywords: Tuple[str, ...]
+    sections: Dict[str, str] = field(default_factory=dict)
+
+    @staticmethod
+    def digest_of(job_description: str) -> str:
+        return hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def build(cls, job_description: str, builder: "PromptBuilder") -> "JobProfile":
+        """Return the cached profile for job_description, building it on first use"""
+        digest = cls.digest_of(job_description)
+        key = (digest, builder.token_budget)
+        profile = _profiles.get(key)
+        if profile is None:
+            profile = cls._parse(digest, job_description, builder)
+            _profiles.set(key, profile)
+        return profile
+
+    @classmethod
+    def _parse(cls, digest: str, job_description: str, builder: "PromptBuilder") -> "JobProfile":
+        sentences = tuple(builder.deduplicate(job_description))
+        sections = cls.extract_sections(job_description)
+        # A job description that is all about the company is still better than none
+        scored = builder.deduplicate(cls.remove_sections(job_description, UNSCORED_SECTIONS)) or list(sentences)
+        prompt_text = builder.fit_sentences(scored, builder.analysis_job_budget(), REQUIREMENT_TERMS)
+
+        requirement_text = " ".join(filter(None, (sections.get('requirements'), sections.get('preferred'))))
+        if requirement_text:
+            requirements = tuple(builder.deduplicate(requirement_text))
+        else:
+            requirements = tuple(sentence for sentence in sentences
+                                 if REQUIREMENT_TERMS.intersection(tokenize(sentence)))
+
+        counts = Counter(token for sentence in sentences for token in tokenize(sentence)
+                         if token not in REQUIREMENT_TERMS and token not in _GENERIC_TERMS
+                         and not token.isdigit())
+        keywords = tuple(token for token, _ in counts.most_common(MAX_KEYWORDS))
+
+        return cls(
+            digest=digest,
+            text=job_description,
+            sentences=sentences,
+            prompt_text=prompt_text,
+            prompt_terms=frozenset(tokenize(prompt_text)),
+            requirements=requirements,
+            skills=tuple(default_matcher().extract(job_description)),
+            keywords=keywords,
+            sections=sections,
+        )
+
+    @staticmethod
+    def _section_spans(job_description: str) -> Iterator[Tuple[str, Match[str], int]]:
+        """(section, heading match, end of its body) for each heading in a job description"""
+        headings = list(_JOB_HEADER_PATTERN.finditer(job_description))
+        for i, match in enumerate(headings):
+            stop = headings[i + 1].start() if i + 1 < len(headings) else len(job_description)
+            yield _JOB_HEADER_SECTIONS[match.group(1).lower()], match, stop
+
+    @staticmethod
+    def extract_sections(job_description: str) -> Dict[str, str]:
+        """Split a job description at its headings; the first body for each section wins"""
+        sections: Dict[str, str] = {}
+        for section, match, stop in JobProfile._section_spans(job_description):
+            body = job_description[match.end():stop].strip()
+            if body and section not in sections:
+                sections[section] = body
+        return sections
+
+    @staticmethod
+    def remove_sections(job_description: str, names: Iterable[str]) -> str:
+        """A job description without the headings and bodies of the named sections"""
+        names = set(names)
+        parts = []
+        position = 0
+        for section, match, stop in JobProfile._section_spans(job_description):
+            if section in names:
+                parts.append(job_description[position:match.start()])
+                position = stop
+        parts.append(job_description[position:])
+        return "".join(parts)
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.result_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_WORKERS = int(os.environ.get("ATS_WORKERS", "2"))
+
+# Seconds between a worker's sweeps for finished jobs old enough to delete
+PURGE_INTERVAL = 3600.0
+
+
+def key_id(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class JobQueue:
+    """Durable SQLite-backed queue of analysis jobs shared by the app and worker processes.
+
+    Workers claim a job by taking a lease on it. If a worker dies or the
+    server restarts, the lease expires and another worker picks the job up
+    again, up to max_attempts times. API keys are never stored; jobs only
+    record a hash so each worker pool claims the jobs submitted with its key.
+    """
+
+    def __init__(self, path: Optional[str] = None, lease_seconds: float = 300.0, max_attempts: int = 3):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "jobs.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key_id TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                lease_expires REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (key_id, status, priority, id)")
+
+    def submit(self, kind: str, payload: Dict[str, Any], api_key: str, priority: int = 0) -> int:
+        """Queue a job and return its id"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, key_id, priority, status, payload, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, key_id(api_key), priority, QUEUED, json.dumps(payload), now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, api_key: str) -> Optional[Dict[str, Any]]:
+        """Lease the next job for this key, or return None if there is nothing to do"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases belong to dead workers; give up after max_attempts
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? "
+                    "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, "Worker stopped before finishing the job", now, RUNNING, now, self.max_attempts)
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE key_id = ? AND "
+                    "(status = ? OR (status = ? AND lease_expires < ?)) "
+                    "ORDER BY priority, id LIMIT 1",
+                    (key_id(api_key), QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires = ?, updated = ? WHERE id = ?",
+                    (RUNNING, now + self.lease_seconds, now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_job(row)
+        job["status"] = RUNNING
+        return job
+
+    def complete(self, job_id: int, result: Any) -> None:
+        self._finish(job_id, DONE, result=json.dumps(result))
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id: int, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires = NULL, updated = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id)
+            )
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return a job's status, result and error"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than older_than seconds"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+                (DONE, FAILED, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+def run_job(analyzer: Any, job: Dict[str, Any]) -> Any:
+    """Execute a claimed job with the given analyzer"""
+    payload = job["payload"]
+    if job["kind"] == "analysis":
+        return analyzer.analyze_resume_match(payload["resume_text"], payload["job_description"],
+                                             priority=job["priority"])
+    raise ValueError(f"Unknown job kind: {job['kind']}")
+
+
+def run_worker(api_key: str, queue_path: Optional[str] = None, poll_interval: float = 0.5,
+               stop_event: Optional[Any] = None) -> None:
+    """Drain jobs for api_key until stop_event is set"""
+    from utils.gemini_analyzer import GeminiAnalyzer
+    from utils.near_duplicates import NearDuplicateIndex
+    from utils.result_cache import ResultCache
+    from utils.results_store import ResultsStore
+    from utils.resume_index import ResumeIndex
+
+    queue = JobQueue(queue_path)
+    analyzer = GeminiAnalyzer(api_key, cache=ResultCache(), near_duplicates=NearDuplicateIndex(),
+                              results_store=ResultsStore(), resume_index=ResumeIndex())
+    next_purge = time.monotonic()
+    while stop_event is None or not stop_event.is_set():
+        if time.monotonic() >= next_purge:
+            # Finished jobs are only kept long enough for their submitters to read the result
+            try:
+                purged = queue.purge()
+                if purged:
+                    logger.info("Purged %d finished jobs", purged)
+            except sqlite3.Error as e:
+                logger.warning("Could not purge finished jobs: %s", e)
+            next_purge = time.monotonic() + PURGE_INTERVAL
+        job = queue.claim(api_key)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            queue.complete(job["id"], run_job(analyzer, job))
+        except Exception as e:
+            logger.exception("Job %s failed", job["id"])
+            queue.fail(job["id"], str(e))
+
+
+def _worker_main(api_key: str, queue_path: Optional[str], stop_event: Any) -> None:
+    # The parent decides when workers stop; ignore Ctrl-C sent to the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(api_key, queue_path, stop_event=stop_event)
+
+
+class WorkerPool:
+    """A set of worker processes draining the job queue for one API key"""
+
+    def __init__(self, api_key: str, processes: int = DEFAULT_WORKERS, queue_path: Optional[str] = None):
+        # spawn avoids forking a multi-threaded server process
+        context = multiprocessing.get_context("spawn")
+        self._stop_event = context.Event()
+        self.processes: List[Any] = [
+            context.Process(target=_worker_main, args=(api_key, queue_path, self._stop_event), daemon=True)
+            for _ in range(processes)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def alive(self) -> int:
+        return sum(process.is_alive() for process in self.processes)
+
+    def stop_in_background(self, timeout: float = 10.0) -> None:
+        """Stop the workers without waiting; each finishes its current job first"""
+        threading.Thread(target=self.stop, args=(timeout,), name="stop-workers", daemon=True).start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,184 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+
+class IncrementalJSONParser:
+    """Parses a streamed JSON object and reports each top-level field as soon as it is complete.
+
+    Text before the opening brace (such as a ```json fence) is ignored. Every
+    character is scanned once, so feeding n characters in any number of
+    chunks costs O(n) overall.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._pair_start = None
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Consume the next chunk and return the fields completed by it"""
+        self.buffer += chunk
+        completed = {}
+        buffer = self.buffer
+        position = self._position
+
+        while position < len(buffer) and not self.done:
+            char = buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._pair_start = position + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.update(self._parse_pair(buffer[self._pair_start:position]))
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                completed.update(self._parse_pair(buffer[self._pair_start:position]))
+                self._pair_start = position + 1
+            position += 1
+
+        self._position = position
+        self.fields.update(completed)
+        return completed
+
+    @staticmethod
+    def _parse_pair(segment: str) -> Dict[str, Any]:
+        """Parse a single '"key": value' segment, ignoring malformed ones"""
+        if not segment.strip():
+            return {}
+        try:
+            return json.loads("{" + segment + "}")
+        except ValueError:
+            return {}
+
+
+# Runs of characters that need no repair, inside and outside strings
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_STRUCTURE_RUN = re.compile(r'[^"{}\[\],]+')
+
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+# Truncated output is retried from at most this many earlier element boundaries
+_MAX_BACKTRACK = 8
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """Parse the JSON object in a model response, repairing it if needed.
+
+    Well-formed JSON is parsed directly. Otherwise repair_json extracts the
+    first object from surrounding prose or code fences and fixes common
+    model mistakes. Raises ValueError when no object can be recovered.
+    """
+    try:
+        result = json.loads(text)
+    except ValueError:
+        result = json.loads(repair_json(text))
+    if not isinstance(result, dict):
+        raise ValueError("Model response is not a JSON object")
+    return result
+
+
+def repair_json(text: str) -> str:
+    """Extract and repair the first JSON object in text in a single scan.
+
+    Handles leading or trailing prose and code fences, trailing commas, raw
+    control characters inside strings, mismatched closing brackets and
+    output truncated mid-object (open strings and containers are closed, and
+    an incomplete final element is dropped).
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object found in model response")
+
+    out: List[str] = []
+    closers: List[str] = []
+    # (output length, open containers) just before each element separator, for truncated input
+    boundaries: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    position = start
+    length = len(text)
+
+    while position < length:
+        char = text[position]
+        if in_string:
+            run = _STRING_RUN.match(text, position)
+            if run:
+                out.append(run.group())
+                position = run.end()
+                continue
+            if char == "\\":
+                out.append(text[position:position + 2])
+                position += 2
+                continue
+            if char == '"':
+                in_string = False
+                out.append(char)
+            else:
+                out.append(_CONTROL_ESCAPES.get(char, "\\u%04x" % ord(char)))
+            position += 1
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            out.append(closers.pop())
+            if not closers:
+                return "".join(out)
+        elif char == ",":
+            boundaries.append((len(out), tuple(closers)))
+            out.append(char)
+        else:
+            run = _STRUCTURE_RUN.match(text, position)
+            out.append(run.group())
+            position = run.end()
+            continue
+        position += 1
+
+    # Truncated: close what is open, backing off to earlier element boundaries until it parses
+    if in_string:
+        if out and out[-1].endswith("\\") and not out[-1].endswith("\\\\"):
+            out[-1] = out[-1][:-1]
+        out.append('"')
+    candidates = [(len(out), tuple(closers))] + boundaries[::-1][:_MAX_BACKTRACK]
+    for end, open_closers in candidates:
+        pieces = out[:end]
+        _drop_trailing_comma(pieces)
+        if pieces and pieces[-1].rstrip().endswith(":"):
+            pieces.append("null")
+        repaired = "".join(pieces) + "".join(reversed(open_closers))
+        try:
+            json.loads(repaired)
+        except ValueError:
+            continue
+        return repaired
+    raise ValueError("Model response contains an incomplete JSON object that could not be repaired")
+
+
+def _drop_trailing_comma(pieces: List[str]) -> None:
+    while pieces and pieces[-1].isspace():
+        pieces.pop()
+    if pieces and pieces[-1] == ",":
+        pieces.pop()
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache bounded by entry count and total weight.
+
+    weigher maps a value to its cost (for example its length in characters);
+    when the combined weight exceeds max_weight the least recently used
+    entries are dropped. A single value heavier than max_weight is not stored.
+    """
+
+    def __init__(self, max_entries: int = 128, max_weight: Optional[int] = None,
+                 weigher: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda value: 1)
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._total_weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for key and mark it as recently used"""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting least recently used entries"""
+        weight = self.weigher(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self._data[key] = value
+            self._weights[key] = weight
+            self._total_weight += weight
+            while len(self._data) > self.max_entries or (
+                self.max_weight is not None and self._total_weight > self.max_weight
+            ):
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key]
+            self._remove(key)
+            return value
+
+    def _remove(self, key: Hashable) -> None:
+        del self._data[key]
+        self._total_weight -= self._weights.pop(key)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self._total_weight = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._data),
+                "weight": self._total_weight
+            }
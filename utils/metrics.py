@@ -0,0 +1,308 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.result_cache import DEFAULT_CACHE_DIR
+
+# JSON line per finished trace; attach a handler at INFO to collect them
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set ATS_METRICS=0 to keep metrics in logs only and skip the SQLite store
+METRICS_ENABLED = os.environ.get("ATS_METRICS", "1") != "0"
+
+# Traces answered entirely from caches are buffered and written together once
+# this many are waiting or the oldest has waited this long, not one transaction each
+HIT_BATCH_SIZE = 50
+HIT_BATCH_SECONDS = 5.0
+
+_current: contextvars.ContextVar = contextvars.ContextVar("ats_trace", default=None)
+
+
+class Trace:
+    """Timings, token counts and cache outcomes for one unit of work, such as an analysis.
+
+    Stage timings accumulate, so a stage that runs twice reports its total.
+    Stages may nest (prompt building includes section splitting for
+    suggestions), so they do not necessarily sum to the total.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.time()
+        self.duration: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[str, int] = {}
+        self.cache: Dict[str, bool] = {}
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_tokens(self, direction: str, count: int) -> None:
+        self.tokens[direction] = self.tokens.get(direction, 0) + int(count)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "started": self.started,
+            "duration": self.duration,
+            "stages": self.stages,
+            "tokens": self.tokens,
+            "cache": self.cache,
+            "error": self.error,
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the active trace; a no-op when no trace is active"""
+    active = _current.get()
+    if active is None:
+        yield
+        return
+    with active.stage(name):
+        yield
+
+
+@contextmanager
+def trace(kind: str) -> Iterator[Trace]:
+    """Collect stage timings for a unit of work and record them when it ends.
+
+    Inside an already active trace this joins it instead, so an analysis run
+    as part of a batch entry is reported once, together with its extraction.
+    """
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+    new = Trace(kind)
+    token = _current.set(new)
+    try:
+        yield new
+    except Exception as e:
+        new.error = str(e)
+        raise
+    finally:
+        _current.reset(token)
+        record(new)
+
+
+def record(finished: Trace) -> None:
+    """Log a finished trace as JSON and add it to the metrics store"""
+    finished.finish()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(finished.to_dict()))
+    store = get_store()
+    if store is not None:
+        try:
+            store.record(finished)
+        except sqlite3.Error as e:
+            logger.warning("Could not record metrics: %s", e)
+
+
+class MetricsStore:
+    """Counters and histograms persisted in SQLite and shared by the app and worker processes.
+
+    Stage latencies are kept as Prometheus-style cumulative histograms, and
+    the most recent traces are kept in full for percentiles and inspection.
+    Cache-hit traces are written in batches (see HIT_BATCH_SIZE); reads in
+    this process and process exit flush them.
+    """
+
+    def __init__(self, path: Optional[str] = None, keep_traces: int = 1000):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "metrics.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.keep_traces = keep_traces
+        self._lock = threading.Lock()
+        self._pending: List[Trace] = []
+        self._pending_since = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (name, labels)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS traces (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        atexit.register(self.flush)
+
+    def record(self, finished: Trace) -> None:
+        """Add a finished trace, buffering it if it was answered entirely from caches"""
+        cached = bool(finished.cache) and all(finished.cache.values()) and not finished.error
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(finished)
+            if (cached and len(self._pending) < HIT_BATCH_SIZE
+                    and time.monotonic() - self._pending_since < HIT_BATCH_SECONDS):
+                return
+            self._write_pending()
+
+    def flush(self) -> None:
+        """Write any buffered traces; called at process exit"""
+        try:
+            with self._lock:
+                self._write_pending()
+        except sqlite3.Error as e:
+            logger.warning("Could not record metrics: %s", e)
+
+    def _write_pending(self) -> None:
+        """Write buffered traces in one transaction; call with the lock held"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        increments = [increment for finished in pending for increment in self._increments(finished)]
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO counters (name, labels, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                increments
+            )
+            self._conn.executemany("INSERT INTO traces (kind, data) VALUES (?, ?)",
+                                   [(finished.kind, json.dumps(finished.to_dict())) for finished in pending])
+            last_id = self._conn.execute("SELECT MAX(id) FROM traces").fetchone()[0]
+            self._conn.execute("DELETE FROM traces WHERE id <= ?", (last_id - self.keep_traces,))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _increments(finished: Trace) -> List[tuple]:
+        """(counter name, labels, increment) for every counter a trace adds to"""
+        kind = finished.kind
+        increments = [
+            ("ats_operations_total", f'kind="{kind}",outcome="{"error" if finished.error else "ok"}"', 1),
+            ("ats_operation_seconds_sum", f'kind="{kind}"', finished.duration or 0.0),
+            ("ats_operation_seconds_count", f'kind="{kind}"', 1),
+        ]
+        for cache, hit in finished.cache.items():
+            increments.append(("ats_cache_requests_total", f'cache="{cache}",result="{"hit" if hit else "miss"}"', 1))
+        for direction, count in finished.tokens.items():
+            increments.append(("ats_tokens_total", f'kind="{kind}",direction="{direction}"', count))
+        for name, seconds in finished.stages.items():
+            # Every bucket is written, even with 0, so each series has the full set of bounds
+            for bound in LATENCY_BUCKETS:
+                increments.append(("ats_stage_seconds_bucket", f'stage="{name}",le="{bound}"', int(seconds <= bound)))
+            increments.append(("ats_stage_seconds_bucket", f'stage="{name}",le="+Inf"', 1))
+            increments.append(("ats_stage_seconds_sum", f'stage="{name}"', seconds))
+            increments.append(("ats_stage_seconds_count", f'stage="{name}"', 1))
+        return increments
+
+    def recent(self, limit: int = 100, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The most recent traces, newest first"""
+        query = "SELECT data FROM traces"
+        params: tuple = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute(query + " ORDER BY id DESC LIMIT ?", params + (limit,)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def counters(self) -> Dict[str, Dict[str, float]]:
+        """All counter values as {name: {labels: value}}"""
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute("SELECT name, labels, value FROM counters ORDER BY name, labels").fetchall()
+        result: Dict[str, Dict[str, float]] = {}
+        for name, labels, value in rows:
+            result.setdefault(name, {})[labels] = value
+        return result
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        families = {
+            "ats_operations_total": ("counter", "Finished operations by kind and outcome"),
+            "ats_operation_seconds": ("summary", "Wall-clock duration of operations"),
+            "ats_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+            "ats_tokens_total": ("counter", "Prompt and response tokens"),
+            "ats_stage_seconds": ("histogram", "Duration of pipeline stages"),
+        }
+        counters = self.counters()
+        for family, (metric_type, help_text) in families.items():
+            names = [name for name in counters if name == family or name.startswith(family + "_")]
+            if not names:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for name in names:
+                for labels, value in sorted(counters[name].items(), key=_bucket_order):
+                    lines.append(f"{name}{{{labels}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically write the Prometheus text to path, e.g. for a node_exporter textfile collector"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = []
+            self._conn.execute("DELETE FROM counters")
+            self._conn.execute("DELETE FROM traces")
+
+
+def _bucket_order(item: Any) -> Any:
+    """Sort key placing histogram buckets in increasing order of their bound"""
+    labels = item[0]
+    series, _, bound = labels.partition(',le="')
+    return series, float(bound.rstrip('"').replace("+Inf", "inf")) if bound else 0.0
+
+
+_store: Optional[MetricsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[MetricsStore]:
+    """The process-wide metrics store, or None when ATS_METRICS=0"""
+    global _store
+    if not METRICS_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = MetricsStore()
+        return _store
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+from utils.gemini_client import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+# "gemini" (default) or "fake" to run the app, CLI and workers without network access
+DEFAULT_BACKEND = os.environ.get("ATS_MODEL_BACKEND", "gemini")
+
+
+class ModelBackend(ABC):
+    """Interface GeminiAnalyzer uses to reach a model.
+
+    generate_content mirrors google.generativeai's GenerativeModel: it returns
+    an object with a .text attribute, or an iterator of such chunks when
+    stream=True. With json_output=True the backend should constrain the
+    response to bare JSON, matching response_schema when one is given. The
+    quota attributes size the shared rate limiter.
+    """
+
+    model_name = MODEL_NAME
+    requests_per_minute = DEFAULT_REQUESTS_PER_MINUTE
+    tokens_per_minute = DEFAULT_TOKENS_PER_MINUTE
+
+    @abstractmethod
+    def generate_content(self, prompt: str, stream: bool = False, json_output: bool = False,
+                         response_schema: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        ...
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini through the google-generativeai SDK"""
+
+    def __init__(self, api_key: str, model_name: str = MODEL_NAME):
+        # Imported here so importing this module stays fast for headless use
+        import google.ai.generativelanguage as glm
+        import google.generativeai as genai
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        # A client of its own rather than genai.configure: a model without one uses the
+        # process-wide client, and every backend would send requests with the last key configured
+        self.model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+    def generate_content(self, prompt: str, stream: bool = False, json_output: bool = False,
+                         response_schema: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        if json_output:
+            config = {"response_mime_type": "application/json"}
+            if response_schema is not None:
+                config["response_schema"] = response_schema
+            kwargs["generation_config"] = config
+        return self.model.generate_content(prompt, stream=stream, **kwargs)
+
+
+class FakeBackendError(Exception):
+    """Simulated transient API failure; code 503 makes GeminiClient retry it"""
+
+    code = 503
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeBackend(ModelBackend):
+    """Local stand-in that answers with valid analysis JSON after a simulated delay.
+
+    Each call sleeps for latency seconds plus up to jitter more, then fails
+    with FakeBackendError with probability error_rate. Scores are derived
+    from a hash of the prompt, so repeated runs give the same answers. Quotas
+    are effectively unlimited so benchmarks measure this code, not throttling.
+    """
+
+    model_name = "fake"
+    requests_per_minute = 10 ** 9
+    tokens_per_minute = 10 ** 12
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 chunk_size: int = 64, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, stream: bool = False, json_output: bool = False,
+                         response_schema: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if not stream:
+            time.sleep(delay)
+            if failed:
+                raise FakeBackendError("Simulated model failure")
+            return FakeResponse(self.respond(prompt, json_output, response_schema))
+        return self._stream(self.respond(prompt, json_output, response_schema), delay, failed)
+
+    def _stream(self, text: str, delay: float, failed: bool) -> Iterator[FakeResponse]:
+        # Half the delay before the first chunk, the rest spread over the others
+        time.sleep(delay / 2)
+        if failed:
+            raise FakeBackendError("Simulated model failure")
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        for chunk in chunks:
+            yield FakeResponse(chunk)
+            time.sleep(delay / 2 / len(chunks))
+
+    @staticmethod
+    def respond(prompt: str, json_output: bool = False, response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Deterministic answer for a prompt: analysis JSON, fenced unless json_output, or suggestion text
+        
+        A response_schema without an overall score is answered with a list of suggestions per property.
+        """
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        properties = (response_schema or {}).get("properties", {})
+        if properties and "overall_match_score" not in properties:
+            return json.dumps({name: [f"Quantify the impact of your {name} with metrics",
+                                      f"Mirror the job description's key terms in your {name}"]
+                               for name in properties})
+        if "JSON" not in prompt:
+            return ("1. Quantify the impact of each role with metrics\n"
+                    "2. Mirror the job description's key terms\n"
+                    "3. Lead each bullet with a strong action verb")
+        analysis = {
+            "overall_match_score": 40 + digest[0] % 56,
+            "summary": "Simulated analysis from the offline fake backend.",
+            "section_scores": {
+                "experience": 40 + digest[1] % 56,
+                "education": 40 + digest[2] % 56,
+                "skills": 40 + digest[3] % 56
+            },
+            "strengths": ["Relevant industry experience"],
+            "weaknesses": ["Few quantified achievements"],
+            "recommendations": ["Add metrics to recent roles", "List cloud certifications"]
+        }
+        if json_output:
+            return json.dumps(analysis)
+        return "```json\n" + json.dumps(analysis, indent=2) + "\n```"
+
+
+def create_backend(api_key: str, name: str = DEFAULT_BACKEND) -> ModelBackend:
+    """Build the backend selected by name ("gemini" or "fake")"""
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown model backend: {name}")
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from utils.result_cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Words per shingle; short shingles keep small edits from hiding a resubmission
+SHINGLE_SIZE = 3
+
+# 16 bands of 8 rows: pairs at 0.85 Jaccard similarity collide in some band
+# 99% of the time, pairs at 0.5 under 7% of the time
+NUM_BANDS = 16
+ROWS_PER_BAND = 8
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+
+# Estimated Jaccard similarity above which two resumes count as the same document
+DEFAULT_THRESHOLD = float(os.environ.get("ATS_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+
+_WORD_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_permutations: Optional[Tuple["np.ndarray", "np.ndarray"]] = None
+_permutations_lock = threading.Lock()
+
+
+def permutations() -> Tuple["np.ndarray", "np.ndarray"]:
+    """Coefficients a and b of the NUM_PERMUTATIONS hash permutations, drawn on first use
+
+    numpy is imported here rather than at module level, so importing the
+    analyzer stays fast when near-duplicate detection is not used.
+    """
+    global _permutations
+    with _permutations_lock:
+        if _permutations is None:
+            import numpy as np
+            # Fixed seed: signatures are persisted, so the permutations must never change
+            random = np.random.RandomState(1)
+            _permutations = (random.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64),
+                             random.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64))
+        return _permutations
+
+
+class MinHash:
+    """MinHash signatures estimating the Jaccard similarity of word shingle sets"""
+
+    @staticmethod
+    def shingles(text: str) -> List[str]:
+        """Overlapping runs of SHINGLE_SIZE lowercase words"""
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) <= SHINGLE_SIZE:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    @staticmethod
+    def signature(text: str) -> "np.ndarray":
+        """NUM_PERMUTATIONS minimum hash values over the shingles of text"""
+        import numpy as np
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+             for shingle in set(MinHash.shingles(text))),
+            dtype=np.uint64
+        )
+        if not hashes.size:
+            return np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+        perm_a, perm_b = permutations()
+        # a * h + b stays below 2**64 because a, b and h are all 32-bit
+        permuted = (np.outer(hashes, perm_a) + perm_b) % np.uint64(_MERSENNE_PRIME) & np.uint64(_MAX_HASH)
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(first: "np.ndarray", second: "np.ndarray") -> float:
+        """Estimated Jaccard similarity: the fraction of positions where two signatures agree"""
+        return float((first == second).mean())
+
+    @staticmethod
+    def band_keys(signature: "np.ndarray") -> List[bytes]:
+        """One key per band of ROWS_PER_BAND signature rows; a shared key makes two documents candidates"""
+        # The band number is part of the key, so equal rows in different bands do not collide
+        return [bytes([band]) + hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+                for band, rows in enumerate(signature.reshape(NUM_BANDS, ROWS_PER_BAND))]
+
+
+class NearDuplicateIndex:
+    """Locality-sensitive hashing index of analyzed resumes, persisted in SQLite.
+
+    Each resume is stored with its MinHash signature and the result cache key
+    of its analysis, under the job it was analyzed against. Lookups only
+    compare signatures sharing at least one band bucket, found through an
+    index, so their cost depends on the number of near matches rather than
+    on the number of stored resumes.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "near_duplicates.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job TEXT NOT NULL,
+                result_key TEXT NOT NULL UNIQUE,
+                signature BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                job TEXT NOT NULL,
+                bucket BLOB NOT NULL,
+                document INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_lookup ON buckets (job, bucket)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_document ON buckets (document)")
+
+    def add(self, job: str, signature: "np.ndarray", result_key: str) -> None:
+        """Index a resume signature for job, pointing at the cache key of its result"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._conn.execute("SELECT id FROM documents WHERE result_key = ?", (result_key,)).fetchone()
+                if old is not None:
+                    self._conn.execute("DELETE FROM buckets WHERE document = ?", old)
+                    self._conn.execute("DELETE FROM documents WHERE id = ?", old)
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (job, result_key, signature) VALUES (?, ?, ?)",
+                    (job, result_key, signature.astype("uint64").tobytes())
+                )
+                self._conn.executemany(
+                    "INSERT INTO buckets (job, bucket, document) VALUES (?, ?, ?)",
+                    [(job, key, cursor.lastrowid) for key in MinHash.band_keys(signature)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query(self, job: str, signature: "np.ndarray") -> List[Tuple[str, float]]:
+        """(result key, similarity) of resumes analyzed for job at or above the threshold, most similar first"""
+        keys = MinHash.band_keys(signature)
+        placeholders = ", ".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result_key, signature FROM documents WHERE id IN "
+                f"(SELECT document FROM buckets WHERE job = ? AND bucket IN ({placeholders}))",
+                [job, *keys]
+            ).fetchall()
+
+        import numpy as np
+        matches = []
+        for result_key, data in rows:
+            similarity = MinHash.similarity(signature, np.frombuffer(data, dtype=np.uint64))
+            if similarity >= self.threshold:
+                matches.append((result_key, similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def remove(self, result_key: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM documents WHERE result_key = ?", (result_key,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM buckets WHERE document = ?", row)
+                self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets")
+            self._conn.execute("DELETE FROM documents")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
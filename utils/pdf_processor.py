@@ -1,81 +1,453 @@
-import PyPDF2
+import hashlib
+import io
+import os
 import re
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Match, Optional, Tuple
+
+from utils.memory_cache import LRUCache
+from utils.metrics import stage, trace
+from utils.pdf_sandbox import RAISED, SandboxError, get_sandbox
+from utils.tokenizer import STOPWORDS
+
+# Per-document budget so one pathological PDF cannot pin a worker
+DEFAULT_MAX_PAGES = 50
+DEFAULT_TIME_BUDGET = 20.0
+
+# Larger uploads are rejected before any parsing
+MAX_PDF_BYTES = int(os.environ.get("ATS_MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+
+# Set ATS_PDF_SANDBOX=0 to parse in this process, e.g. for trusted local files
+SANDBOX_ENABLED = os.environ.get("ATS_PDF_SANDBOX", "1") != "0"
+
+# Seconds a sandboxed parse may run past its time budget before its worker is killed
+SANDBOX_GRACE = 5.0
+
+# Reasons an extraction can fail, reported in ExtractionResult.failure
+UNREADABLE = "unreadable"
+EMPTY_FILE = "empty_file"
+TOO_LARGE = "too_large"
+NOT_A_PDF = "not_a_pdf"
+ENCRYPTED = "encrypted"
+MALFORMED = "malformed"
+NO_TEXT = "no_text"
+# Also timeout, cpu_limit, memory_limit and crashed from utils.pdf_sandbox
+
+# Failures that parsing the same bytes again would repeat; the sandbox limits
+# depend on load and are retried on the next attempt instead of being cached
+DETERMINISTIC_FAILURES = frozenset({ENCRYPTED, MALFORMED, NO_TEXT})
+
+FAILURE_MESSAGES = {
+    UNREADABLE: "The file could not be read.",
+    EMPTY_FILE: "The file is empty.",
+    TOO_LARGE: f"The file is larger than the {MAX_PDF_BYTES // (1024 * 1024)} MB limit.",
+    NOT_A_PDF: "The file is not a PDF.",
+    ENCRYPTED: "The PDF is password protected.",
+    MALFORMED: "The PDF is damaged or uses features that cannot be read.",
+    NO_TEXT: "The PDF contains no extractable text; it may be a scanned image.",
+    "timeout": "Reading the PDF took too long.",
+    "cpu_limit": "Reading the PDF took too long.",
+    "memory_limit": "Reading the PDF needed too much memory.",
+    "crashed": "The PDF reader crashed on this file.",
+}
+
+
+class PDFEncryptedError(Exception):
+    """Raised when a PDF needs a password to read"""
+
+
+@dataclass(frozen=True)
+class ExtractionResult:
+    """Cleaned text of a PDF, or the reason it could not be extracted
+    
+    truncated is set when the time budget ran out before every page was
+    read; text then holds only the pages read so far.
+    """
+    text: Optional[str]
+    failure: Optional[str] = None
+    detail: str = ""
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.failure is None
+
+    @property
+    def message(self) -> str:
+        """A user-facing explanation of the failure, or an empty string"""
+        if self.failure is None:
+            return ""
+        return FAILURE_MESSAGES.get(self.failure, "The PDF could not be read.")
+    
+    @property
+    def warning(self) -> str:
+        """A user-facing note that only part of the document was read, or an empty string"""
+        if not self.truncated:
+            return ""
+        return "Reading the PDF took too long, so only its first pages were used."
+
+# Header phrases for each resume section; "projects" only ends other sections
+SECTION_HEADERS = {
+    'experience': ('professional experience', 'work experience', 'employment history',
+                   'work history', 'experience', 'employment'),
+    'education': ('academic background', 'education', 'qualifications'),
+    'skills': ('technical skills', 'core competencies', 'skills', 'technologies'),
+    'projects': ('projects',),
+}
+_HEADER_SECTIONS = {phrase: section for section, phrases in SECTION_HEADERS.items() for phrase in phrases}
+# Longest phrases first so "work experience" wins over "experience". The
+# leading word boundary is checked by hand: without it the pattern starts with
+# plain literals and the regex engine can skip ahead to candidate characters.
+_HEADER_ALTERNATIVES = '|'.join(phrase.replace(' ', r'\s+')
+                                for phrase in sorted(_HEADER_SECTIONS, key=len, reverse=True))
+_HEADER_PATTERN = re.compile(r'(' + _HEADER_ALTERNATIVES + r')\b')
+_HEADER_PATTERN_IGNORECASE = re.compile(r'(' + _HEADER_ALTERNATIVES + r')\b', re.IGNORECASE)
+_PREVIOUS_TOKEN_PATTERN = re.compile(r'(\S+)[ \t]+$')
+
+# Runs of characters outside \w, whitespace and . , - ( ) @; _keep_skill_symbols
+# decides what survives. A plain character class lets the regex engine skip ahead.
+_SYMBOL_PATTERN = re.compile(r'[^\w\s.,\-()@]+')
+# Page numbers left by PDF footers, removed after symbols so "Page #3" goes too
+_PAGE_PATTERN = re.compile(r'Page \d+')
+
+# Documents shorter than this are always extracted serially. Extracting a page
+# takes about 3.5 ms, while each extra page range costs a worker round trip
+# (about 1 ms) and re-opening the file (about 0.15 ms a page), so ranges only
+# pay off for a few pages and only with a CPU free for each worker; on one CPU
+# four workers were about 25% slower than one at every page count.
+PARALLEL_MIN_PAGES = 8
+
+# Page objects in the raw bytes, used to split a document into page ranges
+# without a worker round trip; object streams hide them, giving no estimate
+_PAGE_OBJECT_PATTERN = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+# Process-wide cache of extraction results keyed by a hash of the PDF bytes,
+# shared by every Streamlit session. Bounded by entry count and total characters.
+_extraction_cache = LRUCache(max_entries=256, max_weight=32 * 1024 * 1024,
+                             weigher=lambda result: len(result.text) if result.text else 1)
+
+
+def _open_pdf(stream):
+    """Open a PdfReader, importing PyPDF2 on first use to keep start-up fast"""
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(stream)
+    if pdf_reader.is_encrypted:
+        # Many PDFs are encrypted with an empty user password and open normally
+        try:
+            decrypted = pdf_reader.decrypt("")
+        except Exception:
+            decrypted = False
+        if not decrypted:
+            raise PDFEncryptedError("the PDF is password protected")
+    return pdf_reader
+
+
+def _count_pages(data: bytes) -> int:
+    """Number of pages in a PDF; run in a sandbox worker"""
+    return len(_open_pdf(io.BytesIO(data)).pages)
+
+
+def _keep_skill_symbols(match: Match[str]) -> str:
+    """Replacement for a run of symbols removed by clean_text
+    
+    A + or # ending a word (C++, C#) and a / between words (CI/CD, PL/SQL)
+    are kept, so skills match in resumes as they do in job descriptions,
+    which are not cleaned. Everything else is dropped.
+    """
+    text = match.string
+    start, end = match.span()
+    if not start or not (text[start - 1].isalnum() or text[start - 1] == '_'):
+        return ''
+    symbols = match.group()
+    suffix = symbols[:len(symbols) - len(symbols.lstrip('+#'))]
+    if suffix:
+        return suffix
+    if symbols == '/' and end < len(text) and (text[end].isalnum() or text[end] == '_'):
+        return '/'
+    return ''
+
+
+def _extract_page_range(data: bytes, start: int, stop: int, time_budget: float) -> Tuple[List[str], bool]:
+    """Extract pages [start, stop) in a worker process, stopping once time_budget seconds have elapsed
+    
+    Returns the page texts and whether the budget ran out before the range
+    was read. The clock starts here rather than in the caller, so time spent
+    waiting for a free worker does not use up the budget.
+    """
+    deadline = time.monotonic() + time_budget
+    pdf_reader = _open_pdf(io.BytesIO(data))
+    texts = []
+    for index in range(start, min(stop, len(pdf_reader.pages))):
+        if time.monotonic() > deadline:
+            return texts, True
+        texts.append(pdf_reader.pages[index].extract_text() or "")
+    return texts, False
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS and Windows
+        return os.cpu_count() or 1
 
 class PDFProcessor:
     @staticmethod
-    def extract_text_from_pdf(pdf_file) -> Optional[str]:
-        """Extract text from uploaded PDF file"""
-        try:
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return PDFProcessor.clean_text(text)
-        except Exception as e:
-            return None
+    def extract_text_from_pdf(pdf_file, workers: int = 1, max_pages: int = DEFAULT_MAX_PAGES,
+                              time_budget: float = DEFAULT_TIME_BUDGET) -> Optional[str]:
+        """Extract text from uploaded PDF file
+        
+        Returns None if the text cannot be extracted; use extract for the reason.
+        """
+        return PDFProcessor.extract(pdf_file, workers, max_pages, time_budget).text
     
     @staticmethod
-    def clean_text(text: str) -> str:
-        """Clean and preprocess extracted text"""
-        # Remove extra whitespaces and newlines
-        text = re.sub(r'\s+', ' ', text)
+    def extract(pdf_file, workers: int = 1, max_pages: int = DEFAULT_MAX_PAGES,
+                time_budget: float = DEFAULT_TIME_BUDGET) -> ExtractionResult:
+        """Extract the cleaned text of a PDF, or report why it cannot be extracted
         
-        # Remove special characters but keep important punctuation
-        text = re.sub(r'[^\w\s\.\,\-\(\)\@]', '', text)
+        Files that are empty, larger than MAX_PDF_BYTES or not PDFs are
+        rejected before parsing. Parsing runs in sandboxed worker processes
+        with CPU, memory and wall-clock limits, so a malicious or broken file
+        fails with a reason instead of stalling or bloating this process.
+        With workers > 1 and CPUs to spare, long documents are split into page
+        ranges that are extracted in parallel and reassembled in order. At
+        most max_pages pages are read. Extraction stops once time_budget
+        seconds have elapsed and returns the text gathered so far, marked
+        truncated; truncated results are not cached, so the next attempt
+        reads the whole document again.
+        """
+        try:
+            data = PDFProcessor._read_bytes(pdf_file)
+        except Exception as e:
+            return ExtractionResult(None, UNREADABLE, str(e))
         
-        # Remove common PDF artifacts
-        text = re.sub(r'Page \d+', '', text)
+        rejected = PDFProcessor._check_upload(data)
+        if rejected is not None:
+            return rejected
         
-        return text.strip()
+        with trace("extraction") as active:
+            key = (hashlib.sha256(data).hexdigest(), max_pages)
+            result = _extraction_cache.get(key)
+            active.cache["extraction"] = result is not None
+            if result is None:
+                result = PDFProcessor._parse_pdf(data, workers, max_pages, time_budget)
+                # Deterministic failures are cached too so a broken upload is not re-parsed on every rerun
+                if (result.ok and not result.truncated) or result.failure in DETERMINISTIC_FAILURES:
+                    _extraction_cache.set(key, result)
+            if not result.ok:
+                active.error = f"{result.failure}: {result.detail}" if result.detail else result.failure
+            return result
     
     @staticmethod
-    def extract_sections(resume_text: str) -> dict:
-        """Extract different sections from resume"""
-        sections = {
-            'experience': '',
-            'education': '',
-            'skills': '',
-            'full_text': resume_text
-        }
+    def _check_upload(data: bytes) -> Optional[ExtractionResult]:
+        """Reject files that are empty, too large or not PDFs, without parsing them"""
+        if not data:
+            return ExtractionResult(None, EMPTY_FILE)
+        if len(data) > MAX_PDF_BYTES:
+            return ExtractionResult(None, TOO_LARGE, f"{len(data)} bytes")
+        # The header may follow a little junk, which PDF readers tolerate
+        if b"%PDF-" not in data[:1024]:
+            return ExtractionResult(None, NOT_A_PDF)
+        return None
+    
+    @staticmethod
+    def iter_pages(pdf_file, max_pages: int = DEFAULT_MAX_PAGES,
+                   time_budget: float = DEFAULT_TIME_BUDGET) -> Iterator[str]:
+        """Yield the raw text of each page in order until the page or time budget runs out
         
-        # Simple regex patterns to identify sections
-        experience_patterns = [
-            r'(experience|work experience|employment|professional experience)(.*?)(?=education|skills|projects|$)',
-            r'(employment history|work history)(.*?)(?=education|skills|projects|$)'
-        ]
+        Parses in this process without resource limits; use extract for untrusted files.
+        """
+        if isinstance(pdf_file, (bytes, bytearray)):
+            pdf_file = io.BytesIO(pdf_file)
+        deadline = time.monotonic() + time_budget
+        pdf_reader = _open_pdf(pdf_file)
         
-        education_patterns = [
-            r'(education|academic background|qualifications)(.*?)(?=experience|skills|projects|$)'
-        ]
+        for index, page in enumerate(pdf_reader.pages):
+            if index >= max_pages or time.monotonic() > deadline:
+                break
+            yield page.extract_text() or ""
+    
+    @staticmethod
+    def is_pdf_path(value: str) -> bool:
+        """Whether a string names a PDF file rather than holding extracted text"""
+        if not value or '\n' in value:
+            return False
+        # isfile is False rather than an error for strings too long or odd to be paths
+        return value.lower().endswith('.pdf') or os.path.isfile(value)
+    
+    @staticmethod
+    def _read_bytes(pdf_file) -> bytes:
+        """Read the raw bytes of a PDF given as a path, bytes or file-like object"""
+        if isinstance(pdf_file, (bytes, bytearray)):
+            return bytes(pdf_file)
+        if hasattr(pdf_file, "getvalue"):
+            return pdf_file.getvalue()
+        if hasattr(pdf_file, "read"):
+            position = pdf_file.tell() if hasattr(pdf_file, "seek") else None
+            data = pdf_file.read()
+            if position is not None:
+                pdf_file.seek(position)
+            return data
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    
+    @staticmethod
+    def _parse_pdf(data: bytes, workers: int, max_pages: int, time_budget: float) -> ExtractionResult:
+        """Parse PDF bytes with PyPDF2 and return cleaned text or the failure reason"""
+        try:
+            with stage("pdf_parse"):
+                if SANDBOX_ENABLED:
+                    pages, truncated = PDFProcessor._extract_pages(data, workers, max_pages, time_budget)
+                else:
+                    pages, truncated = _extract_page_range(data, 0, max_pages, time_budget)
+        except SandboxError as e:
+            if e.reason == RAISED:
+                return ExtractionResult(None, ENCRYPTED if e.error_type == "PDFEncryptedError" else MALFORMED, str(e))
+            return ExtractionResult(None, e.reason, str(e))
+        except PDFEncryptedError as e:
+            return ExtractionResult(None, ENCRYPTED, str(e))
+        except Exception as e:
+            return ExtractionResult(None, MALFORMED, str(e))
+        
+        text = PDFProcessor.clean_text("\n".join(pages))
+        if not text:
+            return ExtractionResult(None, NO_TEXT)
+        return ExtractionResult(text, truncated=truncated)
+    
+    @staticmethod
+    def _extract_pages(data: bytes, workers: int, max_pages: int,
+                       time_budget: float) -> Tuple[List[str], bool]:
+        """Raw text of each page from sandbox workers and whether reading stopped early
         
-        skills_patterns = [
-            r'(skills|technical skills|core competencies|technologies)(.*?)(?=experience|education|projects|$)'
-        ]
+        Long documents are read in parallel page ranges when workers > 1 and
+        there is a CPU for each worker; otherwise one worker reads them all.
+        """
+        workers = min(workers, _available_cpus())
+        sandbox = get_sandbox(workers)
+        if workers > 1:
+            page_count = len(_PAGE_OBJECT_PATTERN.findall(data))
+            if not page_count:
+                page_count = sandbox.run(_count_pages, (data,), time_budget + SANDBOX_GRACE)
+            page_count = min(page_count, max_pages)
+            if page_count >= PARALLEL_MIN_PAGES:
+                return PDFProcessor._extract_parallel(data, page_count, max_pages, workers, time_budget)
         
-        text_lower = resume_text.lower()
+        return sandbox.run(_extract_page_range, (data, 0, max_pages, time_budget), time_budget + SANDBOX_GRACE)
+    
+    @staticmethod
+    def _extract_parallel(data: bytes, page_count: int, max_pages: int, workers: int,
+                          time_budget: float) -> Tuple[List[str], bool]:
+        """Extract page ranges in sandbox workers and reassemble them in page order
         
-        # Extract experience section
-        for pattern in experience_patterns:
-            match = re.search(pattern, text_lower, re.DOTALL | re.IGNORECASE)
-            if match:
-                sections['experience'] = match.group(2).strip()
-                break
+        page_count may be an estimate: the last range runs on to max_pages in
+        case it is low, and ranges past the end of a shorter document are empty.
+        """
+        chunk_size = -(-page_count // workers)
+        ranges = [(start, start + chunk_size) for start in range(0, page_count, chunk_size)]
+        ranges[-1] = (ranges[-1][0], max_pages)
+        sandbox = get_sandbox(workers)
+        timeout = time_budget + SANDBOX_GRACE
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(sandbox.run, _extract_page_range, (data, start, stop, time_budget), timeout)
+                for start, stop in ranges
+            ]
         
-        # Extract education section
-        for pattern in education_patterns:
-            match = re.search(pattern, text_lower, re.DOTALL | re.IGNORECASE)
-            if match:
-                sections['education'] = match.group(2).strip()
+        pages = []
+        for index, future in enumerate(futures):
+            # Keep only the contiguous prefix so pages are never reordered or skipped
+            error = future.exception()
+            if error is not None:
+                if index == 0:
+                    raise error
+                return pages, True
+            chunk, truncated = future.result()
+            pages.extend(chunk)
+            if truncated:
+                return pages, True
+            start, stop = ranges[index]
+            if len(chunk) < stop - start:
+                # The document ended inside this range
                 break
+        return pages, False
+    
+    @staticmethod
+    def clean_text(text: str) -> str:
+        """Clean and preprocess extracted text"""
+        # Collapse whitespace, drop special characters, then remove "Page N" artifacts
+        with stage("clean_text"):
+            text = _SYMBOL_PATTERN.sub(_keep_skill_symbols, ' '.join(text.split()))
+            return _PAGE_PATTERN.sub('', text).strip()
+    
+    @staticmethod
+    def extract_sections(resume_text: str) -> dict:
+        """Extract different sections from resume
         
-        # Extract skills section
-        for pattern in skills_patterns:
-            match = re.search(pattern, text_lower, re.DOTALL | re.IGNORECASE)
-            if match:
-                sections['skills'] = match.group(2).strip()
-                break
+        All section headers are found in a single scan. A header keyword only
+        starts a section when it looks like a heading (start of a line, all
+        caps, or title case not continuing a lowercase sentence); each section
+        runs until the next heading. Cleaned text has no line breaks, so there
+        a title-case keyword is only rejected after a lowercase function word,
+        as in "years of Experience". Text with no headings at all, such as
+        already-lowercased input, treats every header keyword as a heading.
+        """
+        with stage("extract_sections"):
+            sections = {
+                'experience': '',
+                'education': '',
+                'skills': '',
+                'full_text': resume_text
+            }
+            
+            # Matching a lowercased copy is much faster than an IGNORECASE scan, but
+            # only valid when lowercasing keeps every character at the same offset
+            text_lower = resume_text.lower()
+            if len(text_lower) == len(resume_text):
+                matches = _HEADER_PATTERN.finditer(text_lower)
+            else:
+                matches = _HEADER_PATTERN_IGNORECASE.finditer(resume_text)
+            
+            candidates = []
+            for match in matches:
+                start, end = match.span()
+                if start and (resume_text[start - 1].isalnum() or resume_text[start - 1] == '_'):
+                    continue
+                candidates.append((start, end, resume_text[start:end]))
+            
+            single_line = '\n' not in resume_text
+            headings = [candidate for candidate in candidates
+                        if PDFProcessor._is_heading(resume_text, *candidate, single_line)]
+            if not headings:
+                headings = candidates
+            
+            for i, (_, end, phrase) in enumerate(headings):
+                section = _HEADER_SECTIONS[' '.join(phrase.lower().split())]
+                if section not in sections or sections[section]:
+                    continue
+                stop = headings[i + 1][0] if i + 1 < len(headings) else len(resume_text)
+                sections[section] = resume_text[end:stop].lstrip(' \t\r\n:').strip().lower()
+            
+            return sections
+    
+    @staticmethod
+    def _is_heading(text: str, start: int, end: int, phrase: str, single_line: bool = False) -> bool:
+        """Decide whether a header keyword found at text[start:end] is a section heading"""
+        before = start - 1
+        while before >= 0 and text[before] in ' \t':
+            before -= 1
+        if before < 0 or text[before] in '\r\n' or text.startswith(':', end):
+            return True
         
-        return sections
+        if phrase.isupper():
+            return True
+        if phrase.istitle():
+            # "years of Experience" continues a sentence; "Doe Experience" or "555-0100 Skills" does not
+            previous = _PREVIOUS_TOKEN_PATTERN.search(text, max(0, start - 64), start)
+            if not (previous and previous.group(1).isalpha() and previous.group(1).islower()):
+                return True
+            # Without line breaks "engineers Education" is a heading the line break was removed from
+            return single_line and previous.group(1) not in STOPWORDS
+        return False
@@ -0,0 +1,219 @@
+import multiprocessing
+import os
+import signal
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: workers still isolate crashes and hangs, without CPU and memory caps
+    resource = None
+
+# Address space each worker may add on top of what it uses after start-up
+DEFAULT_MEMORY_LIMIT = int(os.environ.get("ATS_PDF_MEMORY_MB", "512")) * 1024 * 1024
+
+# Worker processes kept for PDF parsing
+DEFAULT_SANDBOX_WORKERS = int(os.environ.get("ATS_PDF_WORKERS", "2"))
+
+# Workers are replaced after this many tasks so leaks and fragmentation cannot build up
+MAX_TASKS_PER_WORKER = 200
+
+# Failure reasons reported by SandboxError
+TIMEOUT = "timeout"
+CPU_LIMIT = "cpu_limit"
+MEMORY_LIMIT = "memory_limit"
+CRASHED = "crashed"
+RAISED = "raised"
+
+
+class SandboxError(Exception):
+    """A sandboxed call failed; reason is one of the module's failure constants.
+
+    For RAISED, error_type names the exception raised inside the worker.
+    """
+
+    def __init__(self, reason: str, message: str = "", error_type: Optional[str] = None):
+        super().__init__(message or reason)
+        self.reason = reason
+        self.error_type = error_type
+
+
+def _virtual_memory() -> int:
+    """Current address space of this process in bytes, or 0 if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _limit_memory(memory_limit: int) -> None:
+    if resource is None or memory_limit <= 0:
+        return
+    limit = _virtual_memory() + memory_limit
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _limit_cpu(cpu_seconds: float) -> None:
+    """Let the next task use cpu_seconds more CPU time before the kernel sends SIGXCPU"""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn: Any, memory_limit: int) -> None:
+    """Run (function, args, cpu_seconds) tasks from conn until it closes"""
+    # The parent handles Ctrl-C and stops workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_memory(memory_limit)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        function, args, cpu_seconds = task
+        _limit_cpu(cpu_seconds)
+        try:
+            conn.send(("ok", function(*args)))
+        except MemoryError:
+            # The heap may be unusable after hitting the limit; report and exit
+            conn.send(("error", "MemoryError", "memory limit exceeded"))
+            return
+        except Exception as e:
+            conn.send(("error", type(e).__name__, str(e)))
+
+
+class _Worker:
+    def __init__(self, context: Any, memory_limit: int):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, memory_limit), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+
+class SandboxPool:
+    """Worker processes that run untrusted parsing with CPU, memory and wall-clock limits.
+
+    Each call runs in a separate process whose address space is capped at
+    memory_limit bytes above its start-up size. The call gets cpu_seconds of
+    CPU time before the kernel kills the worker. A worker that is still busy
+    after timeout seconds is killed. Every failure raises SandboxError with a
+    reason, and the server process itself never parses the file.
+    """
+
+    def __init__(self, workers: int = DEFAULT_SANDBOX_WORKERS, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.workers = workers
+        self.memory_limit = memory_limit
+        # spawn avoids forking a multi-threaded server process
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._condition = threading.Condition()
+
+    def run(self, function: Callable[..., Any], args: Tuple[Any, ...], timeout: float,
+            cpu_seconds: Optional[float] = None) -> Any:
+        """Call function(*args) in a worker; function must be importable by module path"""
+        worker = self._acquire()
+        healthy = False
+        try:
+            try:
+                worker.conn.send((function, args, timeout if cpu_seconds is None else cpu_seconds))
+                finished = worker.conn.poll(timeout)
+            except (BrokenPipeError, EOFError, OSError):
+                finished = True
+            if not finished:
+                raise SandboxError(TIMEOUT, f"no result after {timeout:.0f}s")
+            try:
+                status, *payload = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.process.join(1)
+                code = worker.process.exitcode
+                if resource is not None and code == -signal.SIGXCPU:
+                    raise SandboxError(CPU_LIMIT, "CPU time limit exceeded") from None
+                if code in (-signal.SIGKILL, -signal.SIGSEGV) and self.memory_limit > 0:
+                    # Allocation failures inside C code tend to end in a crash rather than MemoryError
+                    raise SandboxError(MEMORY_LIMIT, f"worker died (exit code {code})") from None
+                raise SandboxError(CRASHED, f"worker died (exit code {code})") from None
+            if status == "ok":
+                healthy = True
+                return payload[0]
+            error_type, message = payload
+            if error_type == "MemoryError":
+                raise SandboxError(MEMORY_LIMIT, message)
+            healthy = True
+            raise SandboxError(RAISED, message, error_type)
+        finally:
+            self._release(worker, healthy)
+
+    def _acquire(self) -> _Worker:
+        with self._condition:
+            while not self._idle and self._busy >= self.workers:
+                self._condition.wait()
+            self._busy += 1
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return _Worker(self._context, self.memory_limit)
+        except Exception:
+            with self._condition:
+                self._busy -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        worker.tasks += 1
+        keep = healthy and worker.tasks < MAX_TASKS_PER_WORKER and worker.process.is_alive()
+        if not keep:
+            worker.kill()
+        with self._condition:
+            self._busy -= 1
+            if keep:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Stop every idle worker; busy ones stop when their call returns"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+
+
+_sandbox: Optional[SandboxPool] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox(workers: int = DEFAULT_SANDBOX_WORKERS) -> SandboxPool:
+    """The process-wide sandbox pool, grown to at least workers processes"""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            # Never smaller than the configured size, so concurrent single-document parses do not queue
+            _sandbox = SandboxPool(max(workers, DEFAULT_SANDBOX_WORKERS))
+        elif _sandbox.workers < workers:
+            with _sandbox._condition:
+                _sandbox.workers = workers
+                _sandbox._condition.notify_all()
+        return _sandbox
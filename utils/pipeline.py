@@ -0,0 +1,85 @@
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.pdf_processor import PDFProcessor
+
+if TYPE_CHECKING:
+    from utils.gemini_analyzer import GeminiAnalyzer
+    from utils.job_catalog import JobCatalog
+
+
+def load_document(source: str) -> str:
+    """Read a resume or job description from a .pdf or text file path"""
+    if source.lower().endswith(".pdf"):
+        extraction = PDFProcessor.extract(source)
+        if not extraction.ok:
+            raise ValueError(f"Unable to extract text from {source}: {extraction.message}")
+        return extraction.text
+    with open(source, encoding="utf-8") as f:
+        return f.read()
+
+
+def analyze_resumes(resumes: Iterable[str], job_description: str, api_key: Optional[str] = None,
+                    max_workers: int = 8, top_k: Optional[int] = None,
+                    use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """Screen resume PDFs against a job description without the Streamlit UI.
+
+    resumes are file paths. Yields one record per analyzed resume, in completion
+    order, holding the resume path and the analysis fields. The API key falls
+    back to the GOOGLE_API_KEY environment variable.
+    """
+    analyzer = _create_analyzer(api_key, use_cache)
+    resumes = [os.fspath(resume) for resume in resumes]
+    for index, result in analyzer.analyze_batch(resumes, job_description, max_workers=max_workers, top_k=top_k):
+        yield {"resume": resumes[index], **result}
+
+
+def load_job_catalog(jobs: Iterable[str]) -> "JobCatalog":
+    """Read and vectorize job description files; the file paths become the job names"""
+    from utils.job_catalog import JobCatalog
+
+    jobs = [os.fspath(job) for job in jobs]
+    return JobCatalog.build([load_document(job) for job in jobs], names=jobs)
+
+
+def rank_jobs(resume: str, jobs: Iterable[str], limit: int = 10) -> List[Dict[str, Any]]:
+    """Score one resume file against every job description file locally, best fit first.
+
+    No model calls are made, so no API key is needed.
+    """
+    catalog = load_job_catalog(jobs)
+    return [{"job": catalog.names[index], "local_score": score}
+            for index, score in catalog.top_jobs(load_document(resume), limit)]
+
+
+def match_jobs(resume: str, jobs: Iterable[str], api_key: Optional[str] = None, top_k: int = 3,
+               max_workers: int = 3, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """Find the job descriptions that best fit one resume and analyze only those.
+
+    Every job file is scored locally and the top_k best are analyzed with
+    the model. Yields one record per analyzed job, in completion order,
+    holding the job path, its local score and the analysis fields.
+    """
+    analyzer = _create_analyzer(api_key, use_cache)
+    catalog = load_job_catalog(jobs)
+    for index, score, result in analyzer.match_jobs(load_document(resume), catalog, top_k=top_k,
+                                                    max_workers=max_workers):
+        yield {"job": catalog.names[index], "local_score": score, **result}
+
+
+def _create_analyzer(api_key: Optional[str], use_cache: bool) -> "GeminiAnalyzer":
+    # Imported lazily so argument parsing and `--help` stay instant
+    from utils.gemini_analyzer import GeminiAnalyzer
+    from utils.near_duplicates import NearDuplicateIndex
+    from utils.result_cache import ResultCache
+    from utils.results_store import ResultsStore
+    from utils.resume_index import ResumeIndex
+
+    api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("A Gemini API key is required; pass api_key or set GOOGLE_API_KEY")
+
+    if use_cache:
+        return GeminiAnalyzer(api_key, cache=ResultCache(), near_duplicates=NearDuplicateIndex(),
+                              results_store=ResultsStore(), resume_index=ResumeIndex())
+    return GeminiAnalyzer(api_key)
@@ -0,0 +1,68 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.tokenizer import TOKEN_PATTERN, tokenize
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Return (index, score) for the k highest scores, highest first and ties by index"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    # argpartition keeps selection linear; only the shortlist is fully sorted
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return [(int(index), float(scores[index])) for index in order]
+
+
+class BM25Ranker:
+    """Deterministic BM25 scorer for ranking many documents against one query.
+
+    Scoring only counts the query's own terms, so the term-frequency matrix is
+    documents x query terms and stays small even for thousands of resumes.
+    Inverse document frequencies come from the documents being ranked.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def term_matrix(self, documents: Sequence[str], terms: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the (documents x terms) count matrix and each document's length"""
+        ids = []
+        doc_ids = []
+        lengths = np.zeros(len(documents), dtype=np.float64)
+        for doc_index, document in enumerate(documents):
+            # Stopwords never appear in terms, so documents skip the filter
+            tokens = TOKEN_PATTERN.findall((document or "").lower())
+            lengths[doc_index] = len(tokens)
+            matched = [terms[token] for token in tokens if token in terms]
+            ids.extend(matched)
+            doc_ids.extend([doc_index] * len(matched))
+
+        flat = np.asarray(doc_ids, dtype=np.int64) * len(terms) + np.asarray(ids, dtype=np.int64)
+        counts = np.bincount(flat, minlength=len(documents) * len(terms))
+        return counts.reshape(len(documents), len(terms)).astype(np.float64), lengths
+
+    def score(self, documents: Sequence[str], query: str) -> np.ndarray:
+        """Return the BM25 score of every document against the query"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not documents or not query_terms:
+            return np.zeros(len(documents), dtype=np.float64)
+
+        terms = {term: index for index, term in enumerate(query_terms)}
+        tf, lengths = self.term_matrix(documents, terms)
+
+        doc_count = len(documents)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log((doc_count - df + 0.5) / (df + 0.5) + 1.0)
+
+        avg_length = lengths.mean() or 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / avg_length)
+        weights = tf * (self.k1 + 1.0) / (tf + norm[:, None])
+        return weights @ idf
+
+    def top_k(self, documents: Sequence[str], query: str, k: int) -> List[Tuple[int, float]]:
+        """Return (index, score) for the k best documents, highest score first"""
+        return top_k_indices(self.score(documents, query), k)
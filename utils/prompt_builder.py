@@ -0,0 +1,276 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Set, Union
+
+from utils.job_profile import REQUIREMENT_TERMS, JobProfile
+from utils.pdf_processor import PDFProcessor
+from utils.tokenizer import tokenize
+
+# Rough average for English text with the Gemini tokenizer
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TOKEN_BUDGET = 6000
+
+# The job description comes first, so prompts for the same job share an identical prefix. gemini-1.5-flash
+# does not cache prefixes implicitly and explicit context caches need far more tokens than a job
+# description, so every prompt is still billed for the whole job description.
+ANALYSIS_PREFIX_TEMPLATE = """You are an expert ATS (Applicant Tracking System) analyzer. Compare the following resume against the job description and provide a detailed analysis.
+
+JOB DESCRIPTION:
+{job_description}
+
+"""
+
+ANALYSIS_SUFFIX_TEMPLATE = """RESUME:
+{resume_text}
+
+SKILL CHECK (job description skills found by exact matching):
+Found in resume: {matched_skills}
+Not found in resume: {missing_skills}
+
+Please provide your analysis in the following JSON format, with the fields in this order:
+{{
+    "overall_match_score": <number between 0-100>,
+    "summary": "<brief overall assessment>",
+    "section_scores": {{
+        "experience": <score 0-100>,
+        "education": <score 0-100>,
+        "skills": <score 0-100>
+    }},
+    "strengths": [<list of candidate's key strengths for this role>],
+    "weaknesses": [<list of areas where candidate falls short>],
+    "recommendations": [<list of specific suggestions to improve resume for this role>]
+}}
+
+Be specific and actionable in your analysis. Focus on relevant skills, experience level, and qualifications mentioned in the job description."""
+
+ANALYSIS_TEMPLATE = ANALYSIS_PREFIX_TEMPLATE + ANALYSIS_SUFFIX_TEMPLATE
+
+_SCORE = {"type": "integer"}
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Response schema for JSON mode; mirrors the fields requested in ANALYSIS_TEMPLATE.
+# Skill and keyword lists are computed locally, so the model is not asked for them.
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_match_score": _SCORE,
+        "summary": {"type": "string"},
+        "section_scores": {
+            "type": "object",
+            "properties": {"experience": _SCORE, "education": _SCORE, "skills": _SCORE},
+            "required": ["experience", "education", "skills"]
+        },
+        "strengths": _STRING_LIST,
+        "weaknesses": _STRING_LIST,
+        "recommendations": _STRING_LIST
+    },
+    "required": ["overall_match_score", "summary", "section_scores", "strengths", "weaknesses", "recommendations"]
+}
+
+SUGGESTIONS_TEMPLATE = """Based on these job requirements and resume {section} section, provide 3-5 specific, actionable suggestions for improving the {section} section of the resume.
+
+JOB REQUIREMENTS:
+{job_description}
+
+CURRENT {section_upper} SECTION:
+{section_text}
+
+Focus on the {section} section and provide suggestions that would help the candidate better align with the job requirements. Be specific and practical."""
+
+# Resume sections that get their own suggestions
+SUGGESTION_SECTIONS = ("experience", "skills", "education")
+
+# Every section's suggestions in one call, so the resume and job description are sent once
+ALL_SUGGESTIONS_TEMPLATE = """Based on these job requirements and resume, provide 3-5 specific, actionable suggestions for improving each of the experience, skills and education sections of the resume.
+
+JOB REQUIREMENTS:
+{job_description}
+
+RESUME:
+{resume_text}
+
+Please provide your suggestions in the following JSON format:
+{{
+    "experience": [<suggestions for the experience section>],
+    "skills": [<suggestions for the skills section>],
+    "education": [<suggestions for the education section>]
+}}
+
+Give each section suggestions that would help the candidate better align with the job requirements. Be specific and practical."""
+
+# Response schema for JSON mode; mirrors ALL_SUGGESTIONS_TEMPLATE
+SUGGESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {section: _STRING_LIST for section in SUGGESTION_SECTIONS},
+    "required": list(SUGGESTION_SECTIONS)
+}
+
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?;])\s+|\s*[\r\n•▪●◦·|]+\s*')
+NORMALIZE_PATTERN = re.compile(r'[^a-z0-9+#]+')
+
+# Job-posting boilerplate that never changes a match assessment
+BOILERPLATE_PATTERN = re.compile(
+    r'equal opportunity|affirmative action|without regard to (race|religion|sex)|'
+    r'reasonable accommodation|e-verify|privacy (notice|policy)|'
+    r'click apply|apply now|recruitment agencies|unsolicited resumes',
+    re.IGNORECASE
+)
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of model tokens in text"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and list items"""
+    return [sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text) if sentence and sentence.strip()]
+
+
+@dataclass
+class BuiltPrompt:
+    """A prompt ready to send along with its input token accounting"""
+    text: str
+    input_tokens: int
+    original_tokens: int
+    token_budget: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.input_tokens)
+
+
+class PromptBuilder:
+    """Builds analysis and suggestion prompts within a token budget.
+
+    Repeated sentences and job-posting boilerplate are dropped first. If a
+    document still does not fit, the sentences most relevant to the focus
+    text (requirements, or the resume section being improved) are kept in
+    their original order and the rest are left out.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    @staticmethod
+    def deduplicate(text: str) -> List[str]:
+        """Return the sentences of text without duplicates or boilerplate"""
+        seen = set()
+        sentences = []
+        for sentence in split_sentences(text):
+            key = NORMALIZE_PATTERN.sub(' ', sentence.lower()).strip()
+            if not key or key in seen or BOILERPLATE_PATTERN.search(sentence):
+                continue
+            seen.add(key)
+            sentences.append(sentence)
+        return sentences
+
+    def fit(self, text: str, budget: int, focus_terms: Optional[Set[str]] = None,
+            min_overlap: int = 0) -> str:
+        """Compress text to at most budget tokens, preferring sentences sharing focus_terms
+        
+        Sentences sharing fewer than min_overlap terms with focus_terms are
+        dropped even when the text would fit.
+        """
+        return self.fit_sentences(self.deduplicate(text), budget, focus_terms, min_overlap)
+
+    def fit_sentences(self, sentences: List[str], budget: int, focus_terms: Optional[Set[str]] = None,
+                      min_overlap: int = 0) -> str:
+        """fit for text already split into deduplicated sentences"""
+        focus_terms = focus_terms or REQUIREMENT_TERMS
+        if min_overlap:
+            sentences = [sentence for sentence in sentences
+                         if len(focus_terms.intersection(tokenize(sentence))) >= min_overlap]
+        compressed = " ".join(sentences)
+        if estimate_tokens(compressed) <= budget:
+            return compressed
+
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(focus_terms.intersection(tokenize(sentences[i]))), i)
+        )
+        keep = set()
+        used = 0
+        for i in ranked:
+            cost = estimate_tokens(sentences[i]) + 1
+            if used + cost > budget:
+                continue
+            keep.add(i)
+            used += cost
+        if not keep and sentences:
+            # A single oversized sentence is cut rather than dropped entirely
+            return sentences[ranked[0]][:budget * CHARS_PER_TOKEN]
+        return " ".join(sentences[i] for i in sorted(keep))
+
+    def _budget_for_documents(self, template: str, **fields: str) -> int:
+        overhead = estimate_tokens(template.format(**{name: "" for name in fields}))
+        return max(0, self.token_budget - overhead)
+
+    def analysis_job_budget(self) -> int:
+        """Tokens of an analysis prompt reserved for the job description"""
+        available = self._budget_for_documents(ANALYSIS_TEMPLATE, job_description="", resume_text="",
+                                               matched_skills="", missing_skills="")
+        return available * 2 // 5
+
+    def job_profile(self, job_description: Union[str, JobProfile]) -> JobProfile:
+        """The cached profile for a job description"""
+        if isinstance(job_description, JobProfile):
+            return job_description
+        return JobProfile.build(job_description, self)
+
+    def build_analysis_prompt(self, resume_text: str, job_description: Union[str, JobProfile],
+                              matched_skills: Sequence[str] = (), missing_skills: Sequence[str] = ()) -> BuiltPrompt:
+        """Prompt asking the model for the JSON match analysis
+        
+        matched_skills and missing_skills are the locally matched skill lists,
+        given to the model as context for its scores.
+        """
+        profile = self.job_profile(job_description)
+        skills = {"matched_skills": ", ".join(matched_skills) or "none",
+                  "missing_skills": ", ".join(missing_skills) or "none"}
+        available = self._budget_for_documents(ANALYSIS_TEMPLATE, job_description="", resume_text="", **skills)
+        # The resume may use whatever the job description left unused
+        resume_budget = available - estimate_tokens(profile.prompt_text)
+        resume_part = self.fit(resume_text, resume_budget, set(profile.prompt_terms))
+
+        text = (ANALYSIS_PREFIX_TEMPLATE.format(job_description=profile.prompt_text)
+                + ANALYSIS_SUFFIX_TEMPLATE.format(resume_text=resume_part, **skills))
+        original = ANALYSIS_TEMPLATE.format(job_description=profile.text, resume_text=resume_text, **skills)
+        return BuiltPrompt(text, estimate_tokens(text), estimate_tokens(original), self.token_budget)
+
+    def build_suggestions_prompt(self, resume_text: str, job_description: Union[str, JobProfile],
+                                 section: str) -> BuiltPrompt:
+        """Prompt for one resume section with only the job requirements relevant to it"""
+        profile = self.job_profile(job_description)
+        section_text = PDFProcessor.extract_sections(resume_text).get(section) or resume_text
+        fields = {"section": section, "section_upper": section.upper()}
+        available = self._budget_for_documents(SUGGESTIONS_TEMPLATE, job_description="", section_text="", **fields)
+
+        section_part = self.fit(section_text, available * 3 // 5, set(tokenize(profile.text)))
+        # Keep only the requirements that share terms with this section
+        focus = set(tokenize(section_part)) | set(tokenize(section))
+        requirements = list(profile.requirements) or list(profile.sentences)
+        job_part = self.fit_sentences(requirements, available - estimate_tokens(section_part), focus, min_overlap=1)
+        if not job_part:
+            job_part = self.fit_sentences(list(profile.sentences), available - estimate_tokens(section_part))
+
+        text = SUGGESTIONS_TEMPLATE.format(job_description=job_part, section_text=section_part, **fields)
+        original = SUGGESTIONS_TEMPLATE.format(job_description=profile.text, section_text=resume_text, **fields)
+        return BuiltPrompt(text, estimate_tokens(text), estimate_tokens(original), self.token_budget)
+
+    def build_all_suggestions_prompt(self, resume_text: str,
+                                     job_description: Union[str, JobProfile]) -> BuiltPrompt:
+        """Prompt asking for the JSON suggestions of every section in SUGGESTION_SECTIONS"""
+        profile = self.job_profile(job_description)
+        sections = PDFProcessor.extract_sections(resume_text)
+        # Only the sections being improved, or the whole resume if none are found
+        found = [f"{section.upper()}: {sections[section]}" for section in SUGGESTION_SECTIONS if sections.get(section)]
+        section_text = "\n".join(found) or resume_text
+        available = self._budget_for_documents(ALL_SUGGESTIONS_TEMPLATE, job_description="", resume_text="")
+        job_part = self.fit_sentences(list(profile.sentences), available * 2 // 5)
+        # The resume may use whatever the job description left unused
+        resume_part = self.fit(section_text, available - estimate_tokens(job_part), set(tokenize(job_part)))
+
+        text = ALL_SUGGESTIONS_TEMPLATE.format(job_description=job_part, resume_text=resume_part)
+        original = ALL_SUGGESTIONS_TEMPLATE.format(job_description=profile.text, resume_text=resume_text)
+        return BuiltPrompt(text, estimate_tokens(text), estimate_tokens(original), self.token_budget)
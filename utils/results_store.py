@@ -0,0 +1,282 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.resume_index import QuerySyntaxError
+from utils.result_cache import DEFAULT_CACHE_DIR
+from utils.skills import default_matcher
+
+# Filter fields, mapped to their columns; "score" is the overall match score
+FILTER_FIELDS = {
+    "score": "overall_match_score",
+    "experience": "experience_score",
+    "education": "education_score",
+    "skills": "skills_score",
+}
+
+# Leaderboard sort keys, mapped to their columns
+SORT_FIELDS = dict(FILTER_FIELDS, analyzed="analyzed")
+
+FILTER_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|(>=|<=|!=|=|>|<)|"([^"]*)"|([^\s()"<>=!]+))')
+
+
+class ResultsStore:
+    """Every analysis result, persisted in SQLite for ranking candidates per job.
+
+    Each job description has its own leaderboard of resumes. Scores are
+    stored as indexed columns and skills in an indexed side table, so
+    sorting, filtering and paging run in SQLite rather than in Python.
+    A resume analyzed again for the same job replaces its earlier row.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "results_store.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                resume_id TEXT NOT NULL,
+                headline TEXT NOT NULL,
+                analyzed REAL NOT NULL,
+                overall_match_score INTEGER NOT NULL,
+                experience_score INTEGER,
+                education_score INTEGER,
+                skills_score INTEGER,
+                result TEXT NOT NULL,
+                UNIQUE (job_id, resume_id)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidate_skills (
+                candidate INTEGER NOT NULL,
+                skill TEXT NOT NULL,
+                matched INTEGER NOT NULL
+            )
+        """)
+        for column in SORT_FIELDS.values():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_candidates_{column} ON candidates (job_id, {column})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_skills_lookup ON candidate_skills (skill, matched, candidate)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_skills_candidate ON candidate_skills (candidate)")
+
+    @staticmethod
+    def _headline(text: str, length: int = 80) -> str:
+        """The first non-empty line of text, usually a candidate's name or a job title"""
+        for line in text.splitlines():
+            if line.strip():
+                return line.strip()[:length]
+        return ""
+
+    @staticmethod
+    def skill_key(skill: str) -> str:
+        """Normalize a skill name, resolving known aliases such as k8s to their canonical skill"""
+        found = default_matcher().extract(skill)
+        if len(found) == 1:
+            return found[0].lower()
+        return " ".join(skill.lower().split())
+
+    def add(self, job_id: str, job_description: str, resume_id: str, resume_text: str,
+            result: Dict[str, Any]) -> None:
+        """Store or replace the result of analyzing resume_id against job_id"""
+        now = time.time()
+        section_scores = result.get("section_scores") or {}
+        skills = {self.skill_key(skill): 0 for skill in result.get("missing_skills") or []}
+        skills.update({self.skill_key(skill): 1 for skill in result.get("matched_skills") or []})
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_id, title, created) VALUES (?, ?, ?)",
+                    (job_id, self._headline(job_description) or job_id[:12], now)
+                )
+                self._conn.execute(
+                    "INSERT INTO candidates (job_id, resume_id, headline, analyzed, overall_match_score, "
+                    "experience_score, education_score, skills_score, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (job_id, resume_id) DO UPDATE SET analyzed = excluded.analyzed, "
+                    "overall_match_score = excluded.overall_match_score, "
+                    "experience_score = excluded.experience_score, education_score = excluded.education_score, "
+                    "skills_score = excluded.skills_score, result = excluded.result",
+                    (job_id, resume_id, self._headline(resume_text), now, result.get("overall_match_score", 0),
+                     section_scores.get("experience"), section_scores.get("education"),
+                     section_scores.get("skills"), json.dumps(result))
+                )
+                candidate, = self._conn.execute(
+                    "SELECT id FROM candidates WHERE job_id = ? AND resume_id = ?", (job_id, resume_id)
+                ).fetchone()
+                self._conn.execute("DELETE FROM candidate_skills WHERE candidate = ?", (candidate,))
+                self._conn.executemany(
+                    "INSERT INTO candidate_skills (candidate, skill, matched) VALUES (?, ?, ?)",
+                    [(candidate, skill, matched) for skill, matched in skills.items()]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Every job with stored results and its number of candidates, most recent first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT jobs.job_id, jobs.title, COUNT(candidates.id) FROM jobs "
+                "JOIN candidates ON candidates.job_id = jobs.job_id "
+                "GROUP BY jobs.job_id ORDER BY MAX(candidates.analyzed) DESC"
+            ).fetchall()
+        return [{"job_id": job_id, "title": title, "candidates": count} for job_id, title, count in rows]
+
+    def leaderboard(self, job_id: str, filter_expression: str = "", sort: str = "score",
+                    descending: bool = True, limit: int = 25, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of a job's candidates and the total number matching the filter.
+
+        filter_expression combines score comparisons and skill conditions with
+        and, or, not and parentheses, e.g. 'score > 70 and missing kubernetes'
+        or '(experience >= 60 or education >= 80) and has "machine learning"'.
+        Comparable fields are score, experience, education and skills.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field '{sort}'; use one of {', '.join(SORT_FIELDS)}")
+        where = "job_id = ?"
+        params: List[Any] = [job_id]
+        if filter_expression.strip():
+            condition, condition_params = _FilterParser(self._tokenize_filter(filter_expression)).parse()
+            where += f" AND ({condition})"
+            params += condition_params
+
+        order = "DESC" if descending else "ASC"
+        with self._lock:
+            total, = self._conn.execute(f"SELECT COUNT(*) FROM candidates WHERE {where}", params).fetchone()
+            rows = self._conn.execute(
+                f"SELECT resume_id, headline, analyzed, result FROM candidates WHERE {where} "
+                f"ORDER BY {SORT_FIELDS[sort]} {order}, id {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        page = [{"resume_id": resume_id, "headline": headline, "analyzed": analyzed, **json.loads(result)}
+                for resume_id, headline, analyzed, result in rows]
+        return page, total
+
+    @staticmethod
+    def _tokenize_filter(expression: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = FILTER_TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                raise QuerySyntaxError(f"Unexpected character at position {position}")
+            position = match.end()
+            open_paren, close_paren, operator, phrase, word = match.groups()
+            if open_paren:
+                tokens.append(("(", None))
+            elif close_paren:
+                tokens.append((")", None))
+            elif operator:
+                tokens.append(("OP", operator))
+            elif phrase is not None:
+                tokens.append(("WORD", phrase))
+            elif word.upper() in ("AND", "OR", "NOT"):
+                tokens.append((word.upper(), None))
+            else:
+                tokens.append(("WORD", word))
+        return tokens
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM candidate_skills")
+            self._conn.execute("DELETE FROM candidates")
+            self._conn.execute("DELETE FROM jobs")
+
+
+class _FilterParser:
+    """Recursive-descent parser compiling a leaderboard filter to a SQL condition and its parameters"""
+
+    def __init__(self, tokens: List[tuple]):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self) -> Tuple[str, List[Any]]:
+        result = self._or()
+        if self.position != len(self.tokens):
+            raise QuerySyntaxError("Unexpected ')'")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def _next(self, expected: str, description: str) -> Any:
+        if self._peek() != expected:
+            raise QuerySyntaxError(f"Expected {description}")
+        value = self.tokens[self.position][1]
+        self.position += 1
+        return value
+
+    def _or(self) -> Tuple[str, List[Any]]:
+        sql, params = self._and()
+        while self._peek() == "OR":
+            self.position += 1
+            right, right_params = self._and()
+            sql, params = f"({sql} OR {right})", params + right_params
+        return sql, params
+
+    def _and(self) -> Tuple[str, List[Any]]:
+        sql, params = self._not()
+        while self._peek() in ("AND", "NOT", "WORD", "("):
+            if self._peek() == "AND":
+                self.position += 1
+            right, right_params = self._not()
+            sql, params = f"({sql} AND {right})", params + right_params
+        return sql, params
+
+    def _not(self) -> Tuple[str, List[Any]]:
+        if self._peek() == "NOT":
+            self.position += 1
+            sql, params = self._not()
+            return f"NOT {sql}", params
+        return self._atom()
+
+    def _atom(self) -> Tuple[str, List[Any]]:
+        if self._peek() == "(":
+            self.position += 1
+            result = self._or()
+            self._next(")", "')'")
+            return result
+
+        word = self._next("WORD", "a condition such as 'score > 70' or 'missing kubernetes'").lower()
+        if word in ("has", "matched", "missing"):
+            skill = self._next("WORD", f"a skill after '{word}'")
+            return ("id IN (SELECT candidate FROM candidate_skills WHERE skill = ? AND matched = ?)",
+                    [ResultsStore.skill_key(skill), int(word != "missing")])
+        if word in FILTER_FIELDS:
+            operator = self._next("OP", f"a comparison after '{word}', such as > or <=")
+            value = self._next("WORD", f"a number after '{word} {operator}'")
+            try:
+                number = float(value)
+            except ValueError:
+                raise QuerySyntaxError(f"'{value}' is not a number") from None
+            return f"{FILTER_FIELDS[word]} {'<>' if operator == '!=' else operator} ?", [number]
+        raise QuerySyntaxError(f"Unknown condition '{word}'; use {', '.join(FILTER_FIELDS)}, has or missing")
@@ -0,0 +1,310 @@
+import gc
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set
+
+from utils.pdf_processor import PDFProcessor
+from utils.tokenizer import TOKEN_PATTERN
+from utils.result_cache import DEFAULT_CACHE_DIR
+
+# Fields indexed alongside the full text; query them as field:term
+INDEXED_SECTIONS = ("experience", "education", "skills")
+
+QUERY_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|(?:(\w+):)?"([^"]*)"|([^\s()"]+))')
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a search query cannot be parsed"""
+
+
+class ResumeIndex:
+    """Persistent inverted index of resume terms with positional postings.
+
+    Every indexed document contributes its full text plus the experience,
+    education and skills sections returned by PDFProcessor.extract_sections.
+    Section terms are stored under qualified keys such as "skills:python".
+    Queries support AND, OR, NOT, parentheses and quoted phrases, e.g.
+    'python AND (kubernetes OR k8s) AND NOT "project manager"'. Adjacent
+    terms without an operator are ANDed. Postings are loaded on the first
+    search, so processes that only add documents never hold them in memory.
+    Later searches first load any documents other processes added since.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "resume_index.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        # term -> doc_id -> token positions; the inner dict's keys double as the doc set
+        self._postings: Dict[str, Dict[str, List[int]]] = {}
+        self._names: Dict[str, str] = {}
+        self._loaded = False
+        # Highest rowid whose postings are in memory, and the data_version they were read at
+        self._watermark = 0
+        self._data_version = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                fields TEXT NOT NULL
+            )
+        """)
+
+    def _ensure_loaded(self) -> None:
+        """Load the postings of every document not yet in memory; call with the lock held
+        
+        The first call reads the whole index. Later calls return at once unless
+        another connection has written to the database, and then read only the
+        rows added since. Documents are never deleted, so rowids only grow.
+        """
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._loaded and data_version == self._data_version:
+            return
+        # Millions of small posting lists make the cyclic GC rescan the heap
+        # over and over while loading; none of them can form cycles
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            rows = self._conn.execute(
+                "SELECT rowid, doc_id, name, fields FROM documents WHERE rowid > ? ORDER BY rowid",
+                (self._watermark,)
+            )
+            for rowid, doc_id, name, fields in rows:
+                self._names[doc_id] = name
+                self._add_postings(doc_id, json.loads(fields))
+                self._watermark = rowid
+            self._data_version = data_version
+            self._loaded = True
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    @staticmethod
+    def normalize(text: str) -> List[str]:
+        """Lowercase text and split it into index terms"""
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def add_resume(self, resume_text: str, name: Optional[str] = None) -> str:
+        """Index an extracted resume under the hash of its text, the id the results store also uses"""
+        doc_id = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+        # Checked first so resumes seen before are not split into sections again
+        if not self._rename(doc_id, name):
+            self.add_document(doc_id, resume_text, PDFProcessor.extract_sections(resume_text), name)
+        return doc_id
+
+    def add_document(self, doc_id: str, text: str, sections: Optional[Dict[str, str]] = None,
+                     name: Optional[str] = None) -> None:
+        """Index a resume's full text and sections under doc_id
+        
+        Documents are content-addressed, so adding one again only updates its
+        name, and keeps the stored name when name is None.
+        """
+        if self._rename(doc_id, name):
+            return
+        fields = {"": self._group_positions(self.normalize(text))}
+        for section in INDEXED_SECTIONS:
+            if sections and sections.get(section):
+                fields[section] = self._group_positions(self.normalize(sections[section]))
+        name = name or doc_id
+
+        with self._lock:
+            if self._stored_name(doc_id) is not None:
+                # Added by another thread meanwhile
+                return
+            # Ignored when another process added it since the postings were loaded
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO documents (doc_id, name, fields) VALUES (?, ?, ?)",
+                (doc_id, name, json.dumps(fields))
+            )
+            if self._loaded and cursor.rowcount:
+                self._names[doc_id] = name
+                self._add_postings(doc_id, fields)
+                # Rows other processes added in between are still loaded by the next search
+                if cursor.lastrowid == self._watermark + 1:
+                    self._watermark = cursor.lastrowid
+
+    def _rename(self, doc_id: str, name: Optional[str]) -> bool:
+        """Give an indexed document a new name if one is given; False if doc_id is not indexed"""
+        with self._lock:
+            stored = self._stored_name(doc_id)
+            if stored is None:
+                return False
+            if name and stored != name:
+                self._conn.execute("UPDATE documents SET name = ? WHERE doc_id = ?", (name, doc_id))
+                if self._loaded:
+                    self._names[doc_id] = name
+            return True
+
+    def _stored_name(self, doc_id: str) -> Optional[str]:
+        """Name of an indexed document, or None; call with the lock held"""
+        if self._loaded:
+            return self._names.get(doc_id)
+        row = self._conn.execute("SELECT name FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _group_positions(tokens: List[str]) -> Dict[str, List[int]]:
+        """Map each distinct token to the positions where it occurs"""
+        grouped: Dict[str, List[int]] = {}
+        for position, token in enumerate(tokens):
+            positions = grouped.get(token)
+            if positions is None:
+                grouped[token] = [position]
+            else:
+                positions.append(position)
+        return grouped
+
+    def _add_postings(self, doc_id: str, fields: Dict[str, Dict[str, List[int]]]) -> None:
+        postings = self._postings
+        for field, grouped in fields.items():
+            prefix = f"{field}:" if field else ""
+            for token, positions in grouped.items():
+                term = prefix + token
+                doc_postings = postings.get(term)
+                if doc_postings is None:
+                    postings[term] = {doc_id: positions}
+                else:
+                    doc_postings[doc_id] = positions
+
+    def name(self, doc_id: str) -> str:
+        """Return the display name stored for doc_id"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._names.get(doc_id, doc_id)
+
+    def __len__(self) -> int:
+        """Number of indexed documents, counted in SQLite without loading any postings"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query: str) -> Set[str]:
+        """Return the ids of documents matching a boolean/phrase query"""
+        tokens = self._tokenize_query(query)
+        if not tokens:
+            return set()
+        with self._lock:
+            self._ensure_loaded()
+            parser = _QueryParser(tokens, self)
+            result = parser.parse()
+        return result
+
+    @staticmethod
+    def _tokenize_query(query: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        query = query.strip()
+        while position < len(query):
+            match = QUERY_TOKEN_PATTERN.match(query, position)
+            if not match or match.end() == position:
+                raise QuerySyntaxError(f"Unexpected character at position {position}")
+            position = match.end()
+            open_paren, close_paren, phrase_field, phrase, word = match.groups()
+            if open_paren:
+                tokens.append(("(", None))
+            elif close_paren:
+                tokens.append((")", None))
+            elif phrase is not None:
+                tokens.append(("TERM", (ResumeIndex._field(phrase_field), phrase)))
+            elif word.upper() in ("AND", "OR", "NOT"):
+                tokens.append((word.upper(), None))
+            elif ":" in word:
+                field, value = word.split(":", 1)
+                tokens.append(("TERM", (ResumeIndex._field(field), value)))
+            else:
+                tokens.append(("TERM", ("", word)))
+        return tokens
+
+    @staticmethod
+    def _field(field: Optional[str]) -> str:
+        if not field:
+            return ""
+        if field.lower() not in INDEXED_SECTIONS:
+            raise QuerySyntaxError(f"Unknown field '{field}'; use one of {', '.join(INDEXED_SECTIONS)}")
+        return field.lower()
+
+    def _match(self, field: str, text: str) -> Set[str]:
+        """Documents containing a term or, for multi-token text, the exact phrase"""
+        prefix = f"{field}:" if field else ""
+        terms = [prefix + token for token in self.normalize(text)]
+        if not terms:
+            return set()
+        if len(terms) == 1:
+            return set(self._postings.get(terms[0], ()))
+
+        # Intersect the rarest terms first, then verify adjacency by position
+        doc_sets = sorted((self._postings.get(term, {}) for term in terms), key=len)
+        candidates = set(doc_sets[0]).intersection(*doc_sets[1:])
+        matches = set()
+        for doc_id in candidates:
+            positions = [set(self._postings[term][doc_id]) for term in terms]
+            if any(all(start + offset in positions[offset] for offset in range(1, len(terms)))
+                   for start in positions[0]):
+                matches.add(doc_id)
+        return matches
+
+
+class _QueryParser:
+    """Recursive-descent parser that evaluates a query against an index"""
+
+    def __init__(self, tokens: List[tuple], index: ResumeIndex):
+        self.tokens = tokens
+        self.position = 0
+        self.index = index
+
+    def parse(self) -> Set[str]:
+        result = self._or()
+        if self.position != len(self.tokens):
+            raise QuerySyntaxError("Unexpected ')'")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def _or(self) -> Set[str]:
+        result = self._and()
+        while self._peek() == "OR":
+            self.position += 1
+            result = result | self._and()
+        return result
+
+    def _and(self) -> Set[str]:
+        result = self._not()
+        while self._peek() in ("AND", "NOT", "TERM", "("):
+            if self._peek() == "AND":
+                self.position += 1
+            result = result & self._not()
+        return result
+
+    def _not(self) -> Set[str]:
+        if self._peek() == "NOT":
+            self.position += 1
+            return set(self.index._names) - self._not()
+        return self._atom()
+
+    def _atom(self) -> Set[str]:
+        kind = self._peek()
+        if kind == "(":
+            self.position += 1
+            result = self._or()
+            if self._peek() != ")":
+                raise QuerySyntaxError("Missing ')'")
+            self.position += 1
+            return result
+        if kind == "TERM":
+            field, text = self.tokens[self.position][1]
+            self.position += 1
+            return self.index._match(field, text)
+        raise QuerySyntaxError("Expected a term or '('")
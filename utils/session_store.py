@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from utils.memory_cache import LRUCache
+
+# Total characters of session artifacts kept in memory across every session
+DEFAULT_MAX_CHARS = int(os.environ.get("ATS_SESSION_STORE_CHARS", str(64 * 1024 * 1024)))
+
+
+class SessionStore:
+    """Bounded process-wide store for the large values a UI session works with.
+
+    Sessions keep only the short key returned by put, so per-session state
+    stays small however many recruiters are connected. Values are content
+    addressed, so a job description pasted by many sessions is held once.
+    Least recently used values are evicted once the total size exceeds
+    max_chars; get then returns None and the session must recompute it.
+    Values must be JSON serializable.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS, max_entries: int = 10000):
+        self._values = LRUCache(max_entries=max_entries, max_weight=max_chars, weigher=self._size)
+
+    @staticmethod
+    def _size(value: Any) -> int:
+        return len(json.dumps(value))
+
+    def put(self, value: Any) -> str:
+        """Store value and return the key to fetch it with"""
+        key = hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+        self._values.set(key, value)
+        return key
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        """The value stored under key, or None if it was evicted or key is None"""
+        if key is None:
+            return None
+        return self._values.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._values.stats()
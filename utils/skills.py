@@ -0,0 +1,226 @@
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Canonical skill name -> every lowercase form it may appear as. Ambiguous
+# words (go, r, spring, excel) are listed only in unambiguous forms.
+SKILL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    # Languages
+    "Python": ("python", "python3"),
+    "Java": ("java",),
+    "JavaScript": ("javascript", "js", "ecmascript", "es6"),
+    "TypeScript": ("typescript",),
+    "Go": ("golang", "go lang"),
+    "Rust": ("rust", "rustlang"),
+    "C++": ("c++", "cpp"),
+    "C#": ("c#", "csharp", "c sharp"),
+    "Ruby": ("ruby",),
+    "PHP": ("php",),
+    "Scala": ("scala",),
+    "Kotlin": ("kotlin",),
+    "Swift": ("swift",),
+    "R": ("r programming", "rstudio", "r language"),
+    "MATLAB": ("matlab",),
+    "SQL": ("sql",),
+    "Bash": ("bash", "shell scripting"),
+    # Web and mobile
+    "React": ("react", "react.js", "reactjs"),
+    "React Native": ("react native",),
+    "Angular": ("angular", "angularjs", "angular.js"),
+    "Vue.js": ("vue", "vue.js", "vuejs"),
+    "Node.js": ("node.js", "nodejs", "node js"),
+    "Next.js": ("next.js", "nextjs"),
+    "Django": ("django",),
+    "Flask": ("flask",),
+    "FastAPI": ("fastapi",),
+    "Spring": ("spring boot", "spring framework", "springboot"),
+    "Ruby on Rails": ("rails", "ruby on rails"),
+    ".NET": (".net", "dotnet", "asp.net", ".net core"),
+    "HTML": ("html", "html5"),
+    "CSS": ("css", "css3", "sass", "scss"),
+    "GraphQL": ("graphql",),
+    "REST APIs": ("rest api", "rest apis", "restful", "restful apis", "rest services"),
+    "gRPC": ("grpc",),
+    "Android": ("android",),
+    "iOS": ("ios",),
+    # Data stores
+    "PostgreSQL": ("postgresql", "postgres"),
+    "MySQL": ("mysql",),
+    "SQL Server": ("sql server", "mssql"),
+    "Oracle Database": ("oracle database", "oracle db", "pl/sql"),
+    "MongoDB": ("mongodb", "mongo"),
+    "Redis": ("redis",),
+    "Cassandra": ("cassandra",),
+    "DynamoDB": ("dynamodb",),
+    "Elasticsearch": ("elasticsearch", "elastic search", "opensearch"),
+    "Snowflake": ("snowflake",),
+    "BigQuery": ("bigquery", "big query"),
+    "Redshift": ("redshift",),
+    # Data engineering
+    "Apache Spark": ("spark", "apache spark", "pyspark"),
+    "Hadoop": ("hadoop", "hdfs", "mapreduce"),
+    "Kafka": ("kafka", "apache kafka"),
+    "Airflow": ("airflow", "apache airflow"),
+    "dbt": ("dbt",),
+    "ETL": ("etl", "elt", "data pipelines", "data pipeline"),
+    "Pandas": ("pandas",),
+    "NumPy": ("numpy",),
+    "Data Warehousing": ("data warehouse", "data warehousing"),
+    # Machine learning
+    "Machine Learning": ("machine learning", "machine-learning", "ml"),
+    "Deep Learning": ("deep learning", "deep-learning"),
+    "NLP": ("nlp", "natural language processing"),
+    "Computer Vision": ("computer vision",),
+    "LLMs": ("llm", "llms", "large language models", "generative ai", "genai"),
+    "TensorFlow": ("tensorflow",),
+    "PyTorch": ("pytorch", "torch"),
+    "scikit-learn": ("scikit-learn", "sklearn", "scikit learn"),
+    "Statistics": ("statistics", "statistical analysis", "statistical modeling"),
+    "Data Analysis": ("data analysis", "data analytics"),
+    "Data Visualization": ("data visualization", "data visualisation"),
+    "Tableau": ("tableau",),
+    "Power BI": ("power bi", "powerbi"),
+    "Excel": ("microsoft excel", "ms excel", "advanced excel", "excel spreadsheets"),
+    # Cloud and infrastructure
+    "AWS": ("aws", "amazon web services"),
+    "Azure": ("azure", "microsoft azure"),
+    "GCP": ("gcp", "google cloud", "google cloud platform"),
+    "Docker": ("docker", "containerization"),
+    "Kubernetes": ("kubernetes", "k8s", "eks", "gke", "aks"),
+    "Terraform": ("terraform",),
+    "Ansible": ("ansible",),
+    "CI/CD": ("ci/cd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"),
+    "Jenkins": ("jenkins",),
+    "GitHub Actions": ("github actions",),
+    "Git": ("git", "github", "gitlab", "bitbucket"),
+    "Linux": ("linux", "unix"),
+    "Microservices": ("microservices", "micro-services", "microservice architecture"),
+    "Serverless": ("serverless", "aws lambda", "lambda functions"),
+    "Prometheus": ("prometheus",),
+    "Grafana": ("grafana",),
+    "Observability": ("observability", "monitoring and alerting"),
+    "Networking": ("networking", "tcp/ip"),
+    "Security": ("security", "cybersecurity", "application security"),
+    # Practices
+    "Agile": ("agile", "scrum", "kanban"),
+    "Unit Testing": ("unit testing", "unit tests", "test-driven development", "tdd"),
+    "System Design": ("system design", "distributed systems"),
+    "Project Management": ("project management",),
+    "Product Management": ("product management",),
+    "Leadership": ("leadership", "team lead", "people management", "mentoring", "mentored"),
+    "Communication": ("communication skills", "stakeholder management"),
+    "Jira": ("jira",),
+    "Figma": ("figma",),
+    "SEO": ("seo", "search engine optimization"),
+    "Salesforce": ("salesforce",),
+    "SAP": ("sap",),
+}
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton reporting every occurrence of a set of patterns in one pass"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (index,)
+
+        # Breadth-first, so each state's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, pattern index) for every occurrence, in order of end position"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        patterns = self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                for index in out[state]:
+                    yield position - len(patterns[index]) + 1, index
+
+
+class SkillMatcher:
+    """Finds known skills in text, resolving aliases to canonical names.
+
+    Aliases only match as whole terms, so "java" is not found in
+    "javascript". When matches overlap, the longest one wins, so "react
+    native" is not also reported as "react".
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, Sequence[str]]] = None):
+        aliases = SKILL_ALIASES if aliases is None else aliases
+        self._canonical: Dict[str, str] = {}
+        for skill, names in aliases.items():
+            for name in names:
+                self._canonical.setdefault(" ".join(name.lower().split()), skill)
+        self._automaton = AhoCorasick(self._canonical)
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in text, in order of first mention"""
+        text = " ".join(text.lower().split())
+        length = len(text)
+        matches = []
+        for start, index in self._automaton.iter_matches(text):
+            end = start + len(self._automaton.patterns[index])
+            if start and text[start - 1].isalnum():
+                continue
+            if end < length and text[end].isalnum():
+                continue
+            matches.append((start, end, index))
+
+        skills: Dict[str, None] = {}
+        covered = -1
+        for start, end, index in sorted(matches, key=lambda match: (match[0], -match[1])):
+            if start < covered:
+                continue
+            covered = end
+            skills.setdefault(self._canonical[self._automaton.patterns[index]], None)
+        return list(skills)
+
+    def compare(self, resume_text: str, job_skills: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Split the job's skills into those the resume mentions and those it lacks"""
+        found = set(self.extract(resume_text))
+        matched = [skill for skill in job_skills if skill in found]
+        missing = [skill for skill in job_skills if skill not in found]
+        return matched, missing
+
+
+_default_matcher: Optional[SkillMatcher] = None
+_default_lock = threading.Lock()
+
+
+def default_matcher() -> SkillMatcher:
+    """The matcher for SKILL_ALIASES, compiled on first use"""
+    global _default_matcher
+    with _default_lock:
+        if _default_matcher is None:
+            _default_matcher = SkillMatcher()
+        return _default_matcher
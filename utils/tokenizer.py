@@ -0,0 +1,20 @@
+import re
+from typing import List
+
+# Keeps tokens such as c++, c#, node.js and ci/cd-style fragments intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can
+could did do does doing during each etc for from further had has have having he
+her here hers him his how i if in into is it its itself just me more most my no
+nor not of off on once only or other our ours out over own per same she should
+so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who
+whom why will with within without would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into terms, dropping stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]